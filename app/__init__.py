@@ -1,22 +1,83 @@
-from flask import Flask, jsonify, url_for, send_from_directory
+import contextlib
+import sqlite3
+
+from flask import Flask, current_app, has_app_context
 from config import Config
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from flask_sqlalchemy import SQLAlchemy as _SQLAlchemy
 from flask_mail import Mail
 from flask_cors import CORS
-from redis import Redis
-import rq
-import urllib.parse
+from sqlalchemy import event
+from werkzeug.local import LocalProxy
+
 
+class SQLAlchemy(_SQLAlchemy):
+    def apply_pool_defaults(self, app, options):
+        super(SQLAlchemy, self).apply_pool_defaults(app, options)
+        # Flask-SQLAlchemy 2.3 has no setting for this one.
+        options['pool_pre_ping'] = app.config['SQLALCHEMY_POOL_PRE_PING']
 
-app = Flask(__name__)
-CORS(app)
-app.config.from_object(Config)
-db = SQLAlchemy(app)
-mail = Mail(app)
-migrate = Migrate(app, db)
+
+db = SQLAlchemy()
+mail = Mail()
+cors = CORS()
 max_len = 500
-task_queue = rq.Queue('flask', connection=Redis.from_url(Config.REDIS_URL))
 
 
-from app import routes, models
+def get_redis():
+    """Redis client of the current app. Built on first use; redis-py only
+    connects when the first command is sent."""
+    extensions = current_app.extensions
+    if 'redis' not in extensions:
+        from redis import Redis
+        extensions.setdefault('redis', Redis.from_url(current_app.config['REDIS_URL']))
+    return extensions['redis']
+
+
+def get_task_queue():
+    extensions = current_app.extensions
+    if 'task_queue' not in extensions:
+        import rq
+        extensions.setdefault('task_queue', rq.Queue('flask', connection=get_redis()))
+    return extensions['task_queue']
+
+
+task_queue = LocalProxy(get_task_queue)
+
+_job_app = None
+
+
+def app_context():
+    """Context for code that also runs outside a request, such as RQ jobs.
+    Inside an app context it does nothing; in a worker it pushes a context
+    of an app built on first use."""
+    global _job_app
+    if has_app_context():
+        return contextlib.nullcontext()
+    if _job_app is None:
+        _job_app = create_app()
+    return _job_app.app_context()
+
+
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys, and so ON DELETE CASCADE, unless asked.
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute('PRAGMA foreign_keys=ON')
+
+
+def create_app(config=Config):
+    app = Flask(__name__)
+    app.config.from_object(config)
+    cors.init_app(app)
+    db.init_app(app)
+    # Only on the app's engine: Alembic's batch migrations rebuild tables
+    # and must run with foreign keys off.
+    event.listen(db.get_engine(app), 'connect', enable_sqlite_foreign_keys)
+    mail.init_app(app)
+
+    from app import commands, errors, models, routes
+    from app.cache import response_cache
+    errors.init_app(app)
+    commands.init_app(app)
+    routes.init_app(app)
+    response_cache.init_app(app)
+    return app
@@ -0,0 +1,161 @@
+import threading
+import uuid
+
+from flask import current_app, g
+
+from app import get_redis
+from app.helper import TTLCache
+from app.json_provider import dumps, loads
+
+
+class MemoryBackend(object):
+    errors = ()
+
+    def __init__(self, maxsize):
+        # Payloads expire, and past ``maxsize`` the least recently used go
+        # first. Versions are never dropped: one restarting at 0 could make
+        # an older payload reachable again.
+        self._payloads = TTLCache(maxsize, 0)
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.epoch = uuid.uuid4().hex
+
+    def get_many(self, keys):
+        with self._lock:
+            versions = [self._versions.get(key) for key in keys]
+        return [self._payloads.get(key) if version is None else version
+                for key, version in zip(keys, versions)]
+
+    def set(self, key, value, ttl):
+        self._payloads.set(key, value, ttl)
+
+    def incr(self, key):
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def get_epoch(self, key):
+        return self.epoch
+
+
+class RedisBackend(object):
+    @property
+    def connection(self):
+        return get_redis()
+
+    @property
+    def errors(self):
+        # Imported on use, like the client, so apps caching in memory
+        # never load redis.
+        from redis.exceptions import RedisError
+        return RedisError
+
+    def get_many(self, keys):
+        return self.connection.mget(keys)
+
+    def set(self, key, value, ttl):
+        self.connection.set(key, value, ex=ttl)
+
+    def incr(self, key):
+        self.connection.incr(key)
+
+    def get_epoch(self, key):
+        # Set once per Redis dataset: a flushed or replaced server starts a
+        # new epoch along with its versions counting from 0 again.
+        self.connection.set(key, uuid.uuid4().hex, nx=True)
+        return self.connection.get(key).decode('ascii')
+
+
+class ResponseCache(object):
+    """Cache of serialized response payloads.
+
+    Every payload is stored under a key that embeds the current version of
+    each entity it was built from, so bumping a version on write makes the
+    stale copies unreachable instead of having to find and delete them.
+    Backend failures degrade to a cache miss.
+    """
+
+    def __init__(self, prefix='cache:'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'errors': 0}
+
+    def init_app(self, app):
+        if app.config['CACHE_BACKEND'] == 'redis':
+            app.extensions['response_cache'] = RedisBackend()
+        else:
+            app.extensions['response_cache'] = MemoryBackend(app.config['CACHE_MEMORY_SIZE'])
+
+    @property
+    def backend(self):
+        return current_app.extensions['response_cache']
+
+    @property
+    def ttl(self):
+        return current_app.config['CACHE_TTL']
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _versions(self, backend, names):
+        # Read once per request: a conditional GET and the payload it guards
+        # share one lookup.
+        names = tuple(names)
+        known = g.setdefault('response_cache_versions', {})
+        if names not in known:
+            current = backend.get_many([self.prefix + 'epoch'] + [self.prefix + 'version:' + x for x in names])
+            epoch = current[0] or backend.get_epoch(self.prefix + 'epoch')
+            if isinstance(epoch, bytes):
+                epoch = epoch.decode('ascii')
+            known[names] = (epoch,) + tuple(int(x or 0) for x in current[1:])
+        return known[names]
+
+    def versions(self, names):
+        """The current versions of ``names``, led by the epoch of the
+        backend's counters, to validate responses built from them without
+        querying the tables. None when the backend is unavailable."""
+        backend = self.backend
+        try:
+            return self._versions(backend, names)
+        except backend.errors:
+            self._count('errors')
+            return None
+
+    def fetch(self, key, versions, build):
+        backend = self.backend
+        try:
+            current = self._versions(backend, versions)
+            full_key = '{}{}@{}'.format(self.prefix, key, ','.join(str(x) for x in current[1:]))
+            cached = backend.get_many([full_key])[0]
+        except backend.errors:
+            self._count('errors')
+            return build()
+        if cached is not None:
+            self._count('hits')
+            return loads(cached)
+        self._count('misses')
+        payload = build()
+        try:
+            backend.set(full_key, dumps(payload), self.ttl)
+        except backend.errors:
+            self._count('errors')
+        return payload
+
+    def bump(self, *versions):
+        backend = self.backend
+        g.pop('response_cache_versions', None)
+        for version in versions:
+            try:
+                backend.incr(self.prefix + 'version:' + version)
+            except backend.errors:
+                self._count('errors')
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else None
+        return stats
+
+
+response_cache = ResponseCache()
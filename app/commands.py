@@ -0,0 +1,33 @@
+import click
+from flask.cli import with_appcontext
+
+from app import db
+from app.models.reservation import rebuild_reservation_counters
+
+
+@click.command('rebuild-counters')
+@with_appcontext
+def rebuild_counters():
+    """Recompute the per-status reservation counters of every event."""
+    rebuild_reservation_counters()
+    click.echo('Reservation counters rebuilt')
+
+
+class LazyMigrate(object):
+    """Placeholder for Flask-Migrate's app extension. The ``flask db``
+    commands are the only users of it; the first attribute they read sets
+    up Flask-Migrate, so only they import Alembic."""
+
+    def __init__(self, app, db):
+        self.app = app
+        self.db = db
+
+    def __getattr__(self, name):
+        from flask_migrate import Migrate
+        Migrate(self.app, self.db)
+        return getattr(self.app.extensions['migrate'], name)
+
+
+def init_app(app):
+    app.extensions['migrate'] = LazyMigrate(app, db)
+    app.cli.add_command(rebuild_counters)
@@ -1,22 +1,92 @@
-from functools import wraps
+import base64
+import binascii
+import datetime
+import hashlib
+import json
+import threading
+from functools import partial, wraps
 
-from flask import request
+from flask import current_app, make_response, request, url_for
+from werkzeug.local import LocalProxy
 
 from app.errors import Error, StatusCode, UnauthorizedError
-from app import jwttoken, task_queue
+from app import db, jwttoken, task_queue
+from app.helper import TTLCache
 from app.models.attendee import Attendee
 from app.models.organizer import Organizer
 
+USER_MODELS = {
+    'Organizer': Organizer,
+    'Attendee': Attendee
+}
+
+
+
+def get_auth_cache(name):
+    """Authentication cache ``name`` of the current app, sized from its
+    AUTH_CACHE_SIZE and AUTH_CACHE_TTL."""
+    extensions = current_app.extensions
+    if name not in extensions:
+        config = current_app.config
+        extensions.setdefault(name, TTLCache(config['AUTH_CACHE_SIZE'], config['AUTH_CACHE_TTL']))
+    return extensions[name]
+
+
+token_cache = LocalProxy(partial(get_auth_cache, 'token_cache'))
+profile_cache = LocalProxy(partial(get_auth_cache, 'profile_cache'))
+
+
+class LazyUser(object):
+    """Stands in for the authenticated Organizer/Attendee. ``id`` comes from
+    the token, the row is only loaded when another attribute is used."""
+
+    def __init__(self, user_type, user_id):
+        self.id = user_id
+        self._user_type = user_type
+        self._user = None
+
+    def _load(self):
+        if self._user is None:
+            self._user = USER_MODELS[self._user_type].query.get(self.id)
+            if self._user is None:
+                raise UnauthorizedError()
+        return self._user
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def serialize(self):
+        key = (self._user_type, self.id)
+        data = profile_cache.get(key)
+        if data is None:
+            data = self._load().serialize()
+            profile_cache.set(key, data)
+        return data
+
+
+def invalidate_user(user_type, user_id):
+    profile_cache.delete((user_type, user_id))
+
 
 def parse_args_with_schema(schema):
+    # Schemas are built once per decorated view, one instance per thread,
+    # instead of on every request.
+    local = threading.local()
+    field_names = tuple(field.load_from or name for name, field in schema._declared_fields.items())
+
     def parse_args_with_decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             if request.method == 'GET':
-                requested_args = request.args.to_dict()
+                # Only hand the schema the parameters it declares.
+                query = request.args
+                requested_args = {k: query[k] for k in field_names if k in query}
             else:
                 requested_args = request.json or {}
-            parsed_args, errors = schema().load(requested_args)
+            instance = getattr(local, 'schema', None)
+            if instance is None:
+                instance = local.schema = schema()
+            parsed_args, errors = instance.load(requested_args)
             if errors:
                 raise Error(status_code=StatusCode.BAD_REQUEST, error_data=errors)
             kwargs['args'] = parsed_args
@@ -25,31 +95,204 @@ def parse_args_with_schema(schema):
     return parse_args_with_decorator
 
 
+def int_arg(name, default=None, minimum=1):
+    """Read the integer query parameter ``name``, answering 400 instead of
+    failing when it is malformed or below ``minimum``."""
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        value = None
+    if value is None or value < minimum:
+        raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Invalid ' + name)
+    return value
+
+
+def ids_arg(name='ids', max_count=100):
+    """Read the comma-separated id list ``name``, as in ``?ids=1,2,3``,
+    without duplicates. Answers 400 when it is malformed or longer than
+    ``max_count``."""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        ids = list(dict.fromkeys(int(x) for x in value.split(',')))
+    except ValueError:
+        ids = None
+    if not ids or len(ids) > max_count or min(ids) < 1:
+        raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Invalid ' + name)
+    return ids
+
+
+def batch_response(ids, found, error_message, denied=()):
+    """Response of a batch lookup: ``found`` maps ids to serialized items,
+    the requested ids missing from it are reported under ``errors``."""
+    errors = {}
+    for x in ids:
+        if x in denied:
+            errors[x] = 'Permission denied'
+        elif x not in found:
+            errors[x] = error_message
+    return {'result': found, 'errors': errors}
+
+
+def conditional_get(validator):
+    """Answer with 304 Not Modified when the client's copy is still fresh.
+
+    ``validator`` takes the view arguments and returns a cheap tuple that
+    changes whenever the response would, the ``updated`` timestamp of a
+    single row or the response cache versions of a listing, or None to skip
+    the check. It becomes the ETag and its latest timestamp, if any, the
+    Last-Modified header.
+    """
+    def conditional_get_decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            version = validator(*args, **kwargs)
+            if version is None:
+                return f(*args, **kwargs)
+            version = tuple(version)
+            timestamps = [x for x in version if isinstance(x, datetime.datetime)]
+            last_modified = max(timestamps).replace(microsecond=0) if timestamps else None
+            etag = hashlib.sha1(repr((request.full_path, version)).encode('utf-8')).hexdigest()
+
+            if request.if_none_match:
+                fresh = request.if_none_match.contains_weak(etag)
+            else:
+                fresh = last_modified is not None and request.if_modified_since is not None \
+                    and request.if_modified_since >= last_modified
+            if fresh:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            response.cache_control.public = True
+            response.cache_control.max_age = current_app.config['HTTP_CACHE_MAX_AGE']
+            return response
+        return decorated_function
+    return conditional_get_decorator
+
+
+def authenticate(authorization_header):
+    if 'Bearer' not in authorization_header:
+        raise UnauthorizedError()
+    access_token = authorization_header[len('Bearer '):]
+    payload = token_cache.get(access_token)
+    if payload is None:
+        payload = jwttoken.decode(access_token)
+        if payload is None:
+            raise UnauthorizedError
+        token_cache.set(access_token, payload)
+
+    if payload['user_type'] not in USER_MODELS:
+        raise UnauthorizedError()
+    return LazyUser(payload['user_type'], payload['id']), payload['user_type']
+
+
 def token_auth_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         authorization_header = request.headers.get('Authorization')
         if not authorization_header:
             raise UnauthorizedError()
-        if 'Bearer' not in authorization_header:
-            raise UnauthorizedError()
-        access_token = request.headers['Authorization'][len('Bearer '):]
-        payload = jwttoken.decode(access_token)
+        kwargs['user'], kwargs['user_type'] = authenticate(authorization_header)
+        return f(*args, **kwargs)
+    return decorated_function
 
-        if payload is None:
-            raise UnauthorizedError
-        user_id = payload['id']
-        if payload['user_type'] == 'Organizer':
-            user = Organizer.query.filter_by(id=user_id).first()
+
+def token_auth_optional(f):
+    """Like ``token_auth_required``, but anonymous requests go through with
+    ``user`` and ``user_type`` set to None."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        authorization_header = request.headers.get('Authorization')
+        if not authorization_header:
+            kwargs['user'], kwargs['user_type'] = None, None
         else:
-            user = Attendee.query.filter_by(id=user_id).first()
-        if user is None:
-            raise UnauthorizedError()
-        kwargs['user'] = user
-        kwargs['user_type'] = payload['user_type']
+            kwargs['user'], kwargs['user_type'] = authenticate(authorization_header)
         return f(*args, **kwargs)
     return decorated_function
 
 
+def encode_cursor(values):
+    values = [x.isoformat() if isinstance(x, datetime.datetime) else x for x in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor_value(value, column):
+    if value is None:
+        if not column.nullable:
+            raise ValueError
+        return None
+    if isinstance(column.type, db.DateTime):
+        return datetime.datetime.fromisoformat(value)
+    return value
+
+
+def decode_cursor(cursor, columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [decode_cursor_value(x, column) for x, column in zip(values, columns)]
+    except (ValueError, TypeError, UnicodeError, binascii.Error):
+        raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Invalid cursor')
+
+
+def paginate(query, columns, per_page=15, max_per_page=100):
+    """Paginate ``query`` ordered by the unique key ``columns``.
+
+    ``?page=N`` uses offset pagination, ``?after=<cursor>&limit=N`` seeks
+    past the previous page's last key without counting rows. Returns the
+    items and the pagination fields of the response.
+    """
+    query = query.order_by(*columns)
+    if 'after' not in request.args and 'limit' not in request.args:
+        page = int_arg('page')
+        result = query.paginate(page=page, per_page=per_page)
+        return result.items, {
+            'current_page': page,
+            'next_page_url': 'YES' if page is not None and result.has_next else None
+        }
+
+    limit = min(int_arg('limit', per_page), max_per_page)
+    after = request.args.get('after')
+    if after:
+        values = decode_cursor(after, columns)
+        # (a, b) > (x, y) spelled out so every backend can evaluate it, with
+        # a >= x in front so the index scan starts at the cursor. SQLite and
+        # MySQL sort NULLs first, so past a NULL key come the rest of the
+        # NULLs and then every non-NULL value.
+        condition = columns[-1] > values[-1]
+        for column, value in zip(reversed(columns[:-1]), reversed(values[:-1])):
+            if value is None:
+                condition = db.or_(column.isnot(None), db.and_(column.is_(None), condition))
+            else:
+                condition = db.or_(column > value, db.and_(column == value, condition))
+        if values[0] is not None:
+            query = query.filter(columns[0] >= values[0])
+        query = query.filter(condition)
+
+    items = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        if not hasattr(last, columns[0].key):
+            last = last[0]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    return items, {
+        'limit': limit,
+        'next_cursor': next_cursor,
+        'next_page_url': None if next_cursor is None else url_for(
+            request.endpoint, after=next_cursor, limit=limit, **request.view_args)
+    }
+
+
 def queue_deferred(task, *args, **kwargs):
-    task_queue.enqueue(task, *args, **kwargs)
+    return task_queue.enqueue(task, *args, **kwargs)
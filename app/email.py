@@ -1,20 +1,69 @@
+import smtplib
+import time
+from collections import deque
+
+from flask import current_app
 from flask_mail import Message
 
-from config import Config
-from app import app, mail
+from app import app_context, mail
 from app.common import queue_deferred
 
 
 def send_email_aysnc(message):
-    with app.app_context():
+    with app_context():
         print('Pass!!')
         mail.send(message)
 
 
+def send_emails_async(messages):
+    # Deliver a batch over one SMTP connection. A dropped connection is
+    # reopened with exponential backoff, a message the server rejects is
+    # logged and skipped, and sends are spaced out to stay under
+    # MAIL_RATE_LIMIT messages per second.
+    pending = deque(messages)
+    retries = 0
+    last_sent = 0
+    with app_context():
+        config = current_app.config
+        interval = 1.0 / config['MAIL_RATE_LIMIT'] if config['MAIL_RATE_LIMIT'] else 0
+        while pending:
+            try:
+                with mail.connect() as conn:
+                    while pending:
+                        delay = last_sent + interval - time.monotonic()
+                        if delay > 0:
+                            time.sleep(delay)
+                        try:
+                            conn.send(pending[0])
+                        except smtplib.SMTPServerDisconnected:
+                            raise
+                        except smtplib.SMTPException as e:
+                            current_app.logger.warning('Could not send to %s: %r', pending[0].recipients, e)
+                        last_sent = time.monotonic()
+                        pending.popleft()
+                        retries = 0
+            except OSError as e:
+                # SMTPException is an OSError too. Refused at connect or
+                # login, reconnecting will not help.
+                if isinstance(e, smtplib.SMTPException) and not isinstance(e, smtplib.SMTPServerDisconnected):
+                    raise
+                retries += 1
+                if retries > config['MAIL_MAX_RETRIES']:
+                    raise
+                time.sleep(config['MAIL_RETRY_BACKOFF'] * 2 ** (retries - 1))
+
+
 def send_email(subject, recipients, text_body, html_body, _async=True):
-    message = Message(subject=subject, sender=Config.EMAIL_SENDER,
+    message = Message(subject=subject, sender=current_app.config['EMAIL_SENDER'],
                       recipients=recipients, body=text_body, html=html_body)
-    if _async:
-        queue_deferred(send_email_aysnc, message)
-    else:
-        mail.send(message)
+    send_emails([message], _async=_async)
+
+
+def send_emails(messages, _async=True):
+    batch_size = current_app.config['MAIL_BATCH_SIZE']
+    for i in range(0, len(messages), batch_size):
+        batch = messages[i:i + batch_size]
+        if _async:
+            queue_deferred(send_emails_async, batch)
+        else:
+            send_emails_async(batch)
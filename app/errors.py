@@ -1,6 +1,4 @@
-from flask import jsonify
-
-from app import app
+from app.json_provider import jsonify
 
 
 class StatusCode:
@@ -41,6 +39,14 @@ class UnauthorizedError(Error):
         self.error_data = {}
 
 
-@app.errorhandler(Error)
+class FullSlotError(Error):
+    def __init__(self, *args, **kwargs):
+        super(FullSlotError, self).__init__(status_code=StatusCode.BAD_REQUEST, error_message='Full slot')
+
+
 def custom_error_handler(error):
     return error.to_response()
+
+
+def init_app(app):
+    app.register_error_handler(Error, custom_error_handler)
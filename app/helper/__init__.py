@@ -1,3 +1,24 @@
+import datetime
+import threading
+import time
+from collections import OrderedDict
+
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def to_epoch(value):
+    """Seconds since the epoch for a naive UTC date or datetime, computed
+    arithmetically rather than through ``timetuple()``/``mktime``, which are
+    slow and depend on the server's timezone."""
+    if value is None:
+        return None
+    seconds = (value.toordinal() - _EPOCH_ORDINAL) * 86400
+    if isinstance(value, datetime.datetime):
+        seconds += value.hour * 3600 + value.minute * 60 + value.second
+    return seconds
+
+
 def allowed_image(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in {'png', 'jpg', 'jpeg'}
@@ -6,3 +27,41 @@ def allowed_image(filename):
 def allowed_csv(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in {'csv'}
+
+
+class TTLCache(object):
+    """Thread-safe in-process LRU cache whose entries expire after ``ttl``
+    seconds. A ``maxsize`` of 0 disables it."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        if not self.maxsize:
+            return None
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
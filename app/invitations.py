@@ -0,0 +1,124 @@
+import csv
+import os
+import random
+import string
+from datetime import datetime
+
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import app_context, db
+from app.cache import response_cache
+from app.common import queue_deferred
+from app.email import send_emails
+from app.errors import Error
+from app.models.attendee import Attendee
+from app.models.reservation import Reservation, write_reservations
+
+CHUNK_SIZE = 1000
+
+
+def read_emails(path, chunk_size=CHUNK_SIZE):
+    # Stream the guest list: the first column of every row after the header,
+    # yielded in chunks of unique addresses.
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        chunk = []
+        for row in reader:
+            if not row or not row[0].strip():
+                continue
+            chunk.append(row[0].strip())
+            if len(chunk) == chunk_size:
+                yield list(dict.fromkeys(chunk))
+                chunk = []
+        if chunk:
+            yield list(dict.fromkeys(chunk))
+
+
+def count_emails(path):
+    return sum(len(chunk) for chunk in read_emails(path))
+
+
+def invite_chunk(event_id, emails):
+    attendees = Attendee.__table__
+    now = datetime.utcnow()
+
+    known = dict(db.session.query(Attendee.email, Attendee.id).filter(Attendee.email.in_(emails)))
+    new_users = []
+    for email in emails:
+        if email not in known:
+            new_users.append({
+                'firstname': '', 'lastname': '', 'email': email, 'phone': '',
+                'signup_code': ''.join(random.choices(string.ascii_uppercase + string.digits, k=32)),
+                'password_hash': '', 'password_salt': '', 'created': now, 'updated': now
+            })
+    if new_users:
+        db.session.execute(attendees.insert(), new_users)
+        known.update(db.session.query(Attendee.email, Attendee.id)
+                     .filter(Attendee.email.in_([x['email'] for x in new_users])))
+
+    attendee_ids = [known[email] for email in emails]
+    reserved = {x for x, in db.session.query(Reservation.attendee_id)
+                .filter(Reservation.event_id == event_id, Reservation.attendee_id.in_(attendee_ids))}
+    # Claims the slots for the whole chunk at once.
+    write_reservations(db.session.connection(), event_id,
+                       {x: None for x in attendee_ids if x not in reserved}, 'PENDING',
+                       created=now, updated=now)
+
+    result = [x.serialize() for x in Reservation.query.filter(Reservation.event_id == event_id,
+                                                             Reservation.attendee_id.in_(attendee_ids))]
+    db.session.commit()
+    response_cache.bump('events', 'event:%d' % event_id)
+
+    messages = []
+    for user in new_users:
+        link = current_app.config['URL_MAIL'] + '?signup_code=' + user['signup_code'] + '&mail=' + user['email']
+        messages.append(Message(subject='Your confirm link', sender=current_app.config['EMAIL_SENDER'],
+                                recipients=[user['email']],
+                                body='Here is your confirm link: {}'.format(link)))
+    if messages:
+        send_emails(messages)
+    return result
+
+
+def invite_from_csv(event_id, path, chunk_size=CHUNK_SIZE, progress=None):
+    result = []
+    processed = 0
+    failed = 0
+    for emails in read_emails(path, chunk_size):
+        try:
+            result.extend(invite_chunk(event_id, emails))
+            processed += len(emails)
+        except (Error, SQLAlchemyError):
+            db.session.rollback()
+            failed += len(emails)
+        if progress is not None:
+            progress(processed, failed)
+    return result
+
+
+def import_invitations_job(event_id, path):
+    from rq import get_current_job
+    job = get_current_job()
+
+    def progress(processed, failed):
+        job.meta['rows_processed'] = processed
+        job.meta['rows_failed'] = failed
+        job.save_meta()
+
+    with app_context():
+        try:
+            return invite_from_csv(event_id, path, progress=progress)
+        finally:
+            db.session.remove()
+            os.remove(path)
+
+
+def queue_import(event_id, owner_id, path):
+    return queue_deferred(import_invitations_job, event_id, os.path.abspath(path),
+                          job_timeout=current_app.config['IMPORT_JOB_TIMEOUT'],
+                          result_ttl=current_app.config['IMPORT_RESULT_TTL'],
+                          meta={'owner_id': owner_id, 'event_id': event_id,
+                                'rows_processed': 0, 'rows_failed': 0})
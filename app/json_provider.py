@@ -0,0 +1,43 @@
+import json
+
+from flask import current_app
+from flask.json import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Types JSON can't represent natively (dates, UUIDs, ...) are encoded the
+# way Flask's own encoder does, whichever backend is active.
+_encoder = JSONEncoder()
+
+
+if orjson is not None:
+    def dumps(obj, sort_keys=False, indent=False):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_encoder.default, option=option)
+
+    loads = orjson.loads
+else:
+    def dumps(obj, sort_keys=False, indent=False):
+        return json.dumps(obj, default=_encoder.default, sort_keys=sort_keys, indent=2 if indent else None,
+                          separators=None if indent else (',', ':')).encode('utf-8')
+
+    loads = json.loads
+
+
+def jsonify(*args, **kwargs):
+    """Drop-in for ``flask.jsonify`` that encodes with orjson when it is
+    installed, honouring JSON_SORT_KEYS and JSONIFY_PRETTYPRINT_REGULAR."""
+    if args and kwargs:
+        raise TypeError('jsonify() behavior undefined when passed both args and kwargs')
+    data = args[0] if len(args) == 1 else args or kwargs
+    config = current_app.config
+    indent = config['JSONIFY_PRETTYPRINT_REGULAR'] or current_app.debug
+    body = dumps(data, sort_keys=config['JSON_SORT_KEYS'], indent=indent)
+    return current_app.response_class(body + b'\n', mimetype=config['JSONIFY_MIMETYPE'])
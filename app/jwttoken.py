@@ -1,16 +1,16 @@
 import jwt
 
-from config import Config
+from flask import current_app
 
 
 def encode(user_id, user_type):
-    token = jwt.encode({'id': user_id, 'user_type': user_type}, Config.JWT_SECRET)
+    token = jwt.encode({'id': user_id, 'user_type': user_type}, current_app.config['JWT_SECRET'])
     return str(token, 'utf-8')
 
 
 def decode(token):
     try:
-        payload = jwt.decode(token, Config.JWT_SECRET)
+        payload = jwt.decode(token, current_app.config['JWT_SECRET'])
         return payload
     except:
         return None
@@ -0,0 +1,56 @@
+from operator import attrgetter, itemgetter
+
+from app import db, max_len
+from app.passwords import hash_password, verify_password
+from app.models.timestamp import TimestampMixin
+
+PROFILE_COLUMNS = ('id', 'firstname', 'lastname', 'email', 'phone')
+_loaded_profile_values = itemgetter(*PROFILE_COLUMNS)
+_profile_values = attrgetter(*PROFILE_COLUMNS)
+
+
+class AccountMixin(TimestampMixin):
+    """Columns and behaviour shared by Organizer and Attendee."""
+
+    firstname = db.Column(db.String(max_len), nullable=True)
+    lastname = db.Column(db.String(max_len), nullable=True)
+    email = db.Column(db.String(max_len), index=True, unique=True)
+    phone = db.Column(db.String(max_len), nullable=True)
+    password_hash = db.Column(db.String(max_len))
+    password_salt = db.Column(db.String(max_len))
+
+    @staticmethod
+    def serialize_row(row):
+        """Serialize an ``(id, firstname, lastname, email, phone)`` row without
+        loading the entity."""
+        return dict(zip(PROFILE_COLUMNS, row))
+
+    def set_password(self, password):
+        self.password_salt, self.password_hash = hash_password(password)
+
+    def check_password(self, password):
+        valid, needs_rehash = verify_password(password, self.password_salt, self.password_hash)
+        if needs_rehash:
+            self.set_password(password)
+        return valid
+
+    # Response cache versions to bump when an account changes, ``{id}`` is
+    # replaced with the account's id.
+    cache_version_keys = ()
+
+    def cache_versions(self):
+        return [x.format(id=self.id) for x in self.cache_version_keys]
+
+    def serialize(self):
+        # Read loaded values straight from the instance dict, skipping the
+        # instrumented attribute lookups; expired rows go through the
+        # attributes so they get refreshed.
+        try:
+            values = _loaded_profile_values(self.__dict__)
+        except KeyError:
+            values = _profile_values(self)
+        return dict(zip(PROFILE_COLUMNS, values))
+
+    def update(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
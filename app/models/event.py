@@ -1,8 +1,12 @@
 from app import db, max_len
+import datetime
 import hashlib
 import uuid
 from app.models.timestamp import TimestampMixin
-import time
+from app.models.location import Location
+from app.models.organizer import Organizer
+from app.models.reservation import CAPACITY_COLUMNS
+from app.helper import to_epoch
 
 
 class Event(db.Model, TimestampMixin):
@@ -12,27 +16,90 @@ class Event(db.Model, TimestampMixin):
     description = db.Column(db.String(max_len))
     start_date = db.Column(db.DateTime)
     end_date = db.Column(db.DateTime)
-    location_id = db.Column(db.Integer, db.ForeignKey('locations.id'))
+    location_id = db.Column(db.Integer, db.ForeignKey('locations.id', ondelete='CASCADE'))
     owner_id = db.Column(db.Integer, db.ForeignKey('organizers.id'))
     category = db.Column(db.String(max_len))
     img = db.Column(db.String(max_len))
     type = db.Column(db.String(max_len))
     capacity = db.Column(db.Integer)
+    pending_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    invited_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
 
-    reservations = db.relationship('Reservation')
+    __table_args__ = (
+        db.Index('ix_events_type_start_date', 'type', 'start_date'),
+        db.Index('ix_events_owner_id_type_start_date', 'owner_id', 'type', 'start_date'),
+        db.Index('ix_events_location_id', 'location_id'),
+        db.Index('ix_events_title', 'title'),
+    )
+
+    reservations = db.relationship('Reservation', cascade='all, delete-orphan', passive_deletes=True)
     owner = db.relationship('Organizer')
     location = db.relationship('Location')
     
     def __init__(self, *args, **kwargs):
         super(Event, self).__init__(*args, **kwargs)
+
+    @property
+    def number_of_attendees(self):
+        return self.pending_count + self.invited_count
+
+    def is_full(self, extra=1, status=None):
+        # Reservation counts are kept on the row by the Reservation listeners,
+        # so capacity checks never have to scan the reservations table. This
+        # is only a fast pre-check, the listeners enforce the capacity.
+        if self.capacity is None:
+            return False
+        if status is None:
+            booked = self.number_of_attendees
+        else:
+            booked = sum(getattr(self, column) for column in CAPACITY_COLUMNS[status])
+        return booked + extra > self.capacity
+
+    @classmethod
+    def filter_start_date(cls, query, start=None, end=None):
+        """Keep events starting in ``[start, end]``. A date ``end`` covers
+        that whole day. Behind an equality on type (and owner_id) these are
+        range seeks on the ix_events_*type_start_date indexes."""
+        if start is not None:
+            query = query.filter(cls.start_date >= start)
+        if end is not None:
+            if not isinstance(end, datetime.datetime):
+                query = query.filter(cls.start_date < end + datetime.timedelta(days=1))
+            else:
+                query = query.filter(cls.start_date <= end)
+        return query
+
+    @classmethod
+    def query_with_details(cls):
+        # One query for the event, its owner contact, its location and its
+        # reservation count, instead of lazy-loading each relationship per row.
+        return db.session.query(
+            cls,
+            Organizer.email,
+            Location.name_location,
+            Location.address,
+            cls.pending_count + cls.invited_count
+        ).join(Organizer, cls.owner_id == Organizer.id) \
+            .join(Location, cls.location_id == Location.id)
+
+    @staticmethod
+    def serialize_with_details(row):
+        event, contact, location_name, location_address, number_of_attendees = row
+        return {
+            'detail': event.serialize(),
+            'nummber_of_attendees': number_of_attendees,
+            'contact': contact,
+            'location_name': location_name,
+            'location_address': location_address
+        }
         
     def serialize(self):
         return {
             'id': self.id,
             'title': self.title,
             'description': self.description,
-            'start_date': int(time.mktime(self.start_date.timetuple())),
-            'end_date': int(time.mktime(self.end_date.timetuple())),
+            'start_date': to_epoch(self.start_date),
+            'end_date': to_epoch(self.end_date),
             'location_id': self.location_id,
             'owner_id': self.owner_id,
             'category': self.category,
@@ -7,9 +7,9 @@ class Location(db.Model, TimestampMixin):
     id = db.Column(db.Integer, primary_key=True)
     name_location = db.Column(db.String(max_len))
     address = db.Column(db.String(max_len), index=True, unique=True)
-    owner_id = db.Column(db.Integer, db.ForeignKey('organizers.id'))
+    owner_id = db.Column(db.Integer, db.ForeignKey('organizers.id'), index=True)
     
-    events = db.relationship('Event')
+    events = db.relationship('Event', cascade='all, delete-orphan', passive_deletes=True)
     
     def __init__(self, *args, **kwargs):
         super(Location, self).__init__(*args, **kwargs)
@@ -1,44 +1,14 @@
-from app import db, max_len
-import hashlib
-import uuid
-from app.models.timestamp import TimestampMixin
+from app import db
+from app.models.account import AccountMixin
 
 
-class Organizer(db.Model, TimestampMixin):
+class Organizer(db.Model, AccountMixin):
     __tablename__ = 'organizers'
     id = db.Column(db.Integer, primary_key=True)
-    firstname = db.Column(db.String(max_len))
-    lastname = db.Column(db.String(max_len))
-    email = db.Column(db.String(max_len), index=True, unique=True)
-    phone = db.Column(db.String(max_len))
-    password_hash = db.Column(db.String(max_len))
-    password_salt = db.Column(db.String(max_len))
+    cache_version_keys = ('organizers', 'organizer:{id}', 'events')
 
     events = db.relationship('Event')
     locations = db.relationship('Location')
     
     def __init__(self, *args, **kwargs):
         super(Organizer, self).__init__(*args, **kwargs)
-
-    def set_password(self, password):
-        salt = uuid.uuid4().hex
-        hashed_password = hashlib.sha512((password + salt).encode('utf-8')).hexdigest()
-        self.password_salt = salt
-        self.password_hash = hashed_password
-
-    def check_password(self, password):
-        hashed_password = hashlib.sha512((password + self.password_salt).encode('utf-8')).hexdigest()
-        return self.password_hash == hashed_password
-
-    def serialize(self):
-        return {
-            'id': self.id,
-            'firstname': self.firstname,
-            'lastname': self.lastname,
-            'email': self.email,
-            'phone': self.phone
-        }
-
-    def update(self, **kwargs):
-        for key, value in kwargs.items():
-            setattr(self, key, value)
@@ -1,15 +1,42 @@
+from collections import Counter
+
 from app import db, max_len
 import hashlib
 import uuid
+from app.errors import FullSlotError
 from app.models.timestamp import TimestampMixin
 
+# Reservation statuses that are tallied on the event row, and the column
+# holding each tally. WAITLISTED reservations hold no slot and are not
+# counted.
+COUNTER_COLUMNS = {
+    'PENDING': 'pending_count',
+    'INVITED': 'invited_count'
+}
+
+# Counters that must stay within the event capacity when a reservation of the
+# given status is added: invitations are bounded by every outstanding slot,
+# confirmations only by the confirmed ones.
+CAPACITY_COLUMNS = {
+    'PENDING': ('pending_count', 'invited_count'),
+    'INVITED': ('invited_count',)
+}
+
 
 class Reservation(db.Model, TimestampMixin):
     __tablename__ = 'reservations'
     id = db.Column(db.Integer, primary_key=True)
-    status = db.Column(db.String(max_len))
-    event_id = db.Column(db.Integer, db.ForeignKey('events.id'))
-    attendee_id = db.Column(db.Integer, db.ForeignKey('attendees.id'))
+    status = db.column_property(db.Column(db.String(max_len)), active_history=True)
+    event_id = db.column_property(db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE')), active_history=True)
+    attendee_id = db.Column(db.Integer, db.ForeignKey('attendees.id', ondelete='CASCADE'))
+    # Place in the event's waitlist, lowest first; only set while WAITLISTED.
+    position = db.Column(db.Integer)
+
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'attendee_id', name='uq_reservations_event_attendee'),
+        db.Index('ix_reservations_event_id_status_position', 'event_id', 'status', 'position'),
+        db.Index('ix_reservations_attendee_id', 'attendee_id'),
+    )
 
     events = db.relationship("Event")
     attendees = db.relationship("Attendee")
@@ -22,5 +49,97 @@ class Reservation(db.Model, TimestampMixin):
             'id': self.id,
             'status': self.status,
             'event_id': self.event_id,
-            'attendee_id': self.attendee_id
+            'attendee_id': self.attendee_id,
+            'position': self.position
         }
+
+
+def adjust_counter(connection, event_id, status, delta):
+    column = COUNTER_COLUMNS.get(status)
+    if column is None or event_id is None or delta == 0:
+        return
+    events = db.metadata.tables['events']
+    query = events.update() \
+        .where(events.c.id == event_id) \
+        .values({column: events.c[column] + delta})
+    if delta > 0:
+        # Claim the slots with a single conditional UPDATE: the row lock it
+        # takes serializes concurrent bookings of the same event only, and
+        # no matching row means the event is already full.
+        booked = sum(events.c[c] for c in CAPACITY_COLUMNS[status])
+        query = query.where(db.or_(events.c.capacity.is_(None), booked + delta <= events.c.capacity))
+    if connection.execute(query).rowcount == 0 and delta > 0:
+        raise FullSlotError()
+
+
+def write_reservations(connection, event_id, changes, status, **values):
+    """Bring the reservations to ``event_id`` of the attendees in
+    ``changes``, a mapping of attendee id to the current status of their
+    reservation (None for none yet), to ``status`` with one bulk statement:
+    an INSERT for new reservations, a DELETE when ``status`` is None, an
+    UPDATE, which also clears the waitlist position, otherwise.
+
+    Bulk statements bypass the Reservation listeners, so the counters are
+    kept here, releasing slots before claiming any. FullSlotError is raised
+    before any reservation is written, the transaction must be rolled back
+    if slots were released. Returns the ids of the attendees whose
+    reservation changed.
+    """
+    changes = {attendee_id: old for attendee_id, old in changes.items() if old != status}
+    if not changes:
+        return []
+    released = Counter(changes.values())
+    if None in released and len(released) > 1:
+        raise ValueError('cannot insert and change reservations in one statement')
+    for old, count in released.items():
+        adjust_counter(connection, event_id, old, -count)
+    adjust_counter(connection, event_id, status, len(changes))
+
+    reservations = Reservation.__table__
+    attendee_ids = list(changes)
+    if None in released:
+        connection.execute(reservations.insert(), [
+            dict(values, status=status, event_id=event_id, attendee_id=x) for x in attendee_ids])
+        return attendee_ids
+    if status is None:
+        statement = reservations.delete()
+    else:
+        statement = reservations.update().values(dict({'position': None}, status=status, **values))
+    connection.execute(statement
+                       .where(reservations.c.event_id == event_id)
+                       .where(reservations.c.attendee_id.in_(attendee_ids)))
+    return attendee_ids
+
+
+def rebuild_reservation_counters():
+    events = db.metadata.tables['events']
+    reservations = Reservation.__table__
+    for status, column in COUNTER_COLUMNS.items():
+        count = db.select([db.func.count(reservations.c.id)]) \
+            .where(reservations.c.event_id == events.c.id) \
+            .where(reservations.c.status == status) \
+            .as_scalar()
+        db.session.execute(events.update().values({column: count}))
+    db.session.commit()
+
+
+@db.event.listens_for(Reservation, 'after_insert')
+def _count_inserted(mapper, connection, target):
+    adjust_counter(connection, target.event_id, target.status, 1)
+
+
+@db.event.listens_for(Reservation, 'after_update')
+def _count_updated(mapper, connection, target):
+    status = db.inspect(target).attrs.status.history
+    event_id = db.inspect(target).attrs.event_id.history
+    if not status.has_changes() and not event_id.has_changes():
+        return
+    old_status = status.deleted[0] if status.deleted else target.status
+    old_event_id = event_id.deleted[0] if event_id.deleted else target.event_id
+    adjust_counter(connection, old_event_id, old_status, -1)
+    adjust_counter(connection, target.event_id, target.status, 1)
+
+
+@db.event.listens_for(Reservation, 'before_delete')
+def _count_deleted(mapper, connection, target):
+    adjust_counter(connection, target.event_id, target.status, -1)
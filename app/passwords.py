@@ -0,0 +1,64 @@
+import hashlib
+import hmac
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app
+
+ALGORITHM = 'pbkdf2_sha256'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), iterations).hex()
+
+
+def _legacy_sha512(password, salt):
+    return hashlib.sha512((password + salt).encode('utf-8')).hexdigest()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=current_app.config['PASSWORD_HASH_WORKERS'])
+    return _pool
+
+
+def _run(fn, *args):
+    # The KDF is CPU bound; running it in a bounded pool of worker processes
+    # keeps a login storm from holding the GIL against every other request.
+    if not current_app.config['PASSWORD_HASH_WORKERS']:
+        return fn(*args)
+    return _get_pool().submit(fn, *args).result()
+
+
+def hash_password(password):
+    """Return ``(salt, password_hash)`` for storing a new password."""
+    salt = uuid.uuid4().hex
+    iterations = current_app.config['PASSWORD_ITERATIONS']
+    digest = _run(_pbkdf2, password, salt, iterations)
+    return salt, '%s$%d$%s' % (ALGORITHM, iterations, digest)
+
+
+def verify_password(password, salt, password_hash):
+    """Check ``password`` in constant time. Returns ``(valid, needs_rehash)``;
+    the latter is set for legacy SHA-512 hashes and outdated iteration
+    counts so the caller can upgrade the stored hash after a login."""
+    if not salt or not password_hash:
+        # Burn the same amount of work as a real check so unknown emails
+        # can't be told apart by response time.
+        _run(_pbkdf2, password, uuid.uuid4().hex, current_app.config['PASSWORD_ITERATIONS'])
+        return False, False
+    if '$' not in password_hash:
+        valid = hmac.compare_digest(_legacy_sha512(password, salt), password_hash)
+        return valid, valid
+    algorithm, iterations, digest = password_hash.split('$', 2)
+    if algorithm != ALGORITHM:
+        return False, False
+    valid = hmac.compare_digest(_run(_pbkdf2, password, salt, int(iterations)), digest)
+    return valid, valid and int(iterations) != current_app.config['PASSWORD_ITERATIONS']
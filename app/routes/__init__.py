@@ -1,5 +1,13 @@
-from . import attendee
-from . import event
-from . import location
-from . import organizer
-from . import reservation
+from app.models.attendee import Attendee
+from app.models.organizer import Organizer
+from . import account, attendee, event, location, metrics, organizer, reservation
+
+
+def init_app(app):
+    prefix = app.config['PREFIX']
+    app.register_blueprint(account.make_account_blueprint(Organizer), url_prefix=prefix + '/organizers')
+    app.register_blueprint(account.make_account_blueprint(Attendee, invitable=True),
+                           url_prefix=prefix + '/attendees')
+    for module in (attendee, event, location, organizer, reservation, metrics):
+        app.register_blueprint(module.bp, url_prefix=prefix)
+    app.register_blueprint(event.images, url_prefix=app.config['PREFIX_FOR_IMG'])
@@ -0,0 +1,115 @@
+from flask import Blueprint
+from marshmallow import Schema, fields, validate
+
+from app import db, jwttoken, max_len
+from app.cache import response_cache
+from app.common import invalidate_user, parse_args_with_schema, token_auth_required
+from app.errors import Error, StatusCode
+from app.json_provider import jsonify
+from app.passwords import verify_password
+
+
+class UserSignUpSchema(Schema):
+    email = fields.Email(validate=validate.Length(max=max_len), required=True)
+    password = fields.String(validate=validate.Length(max=max_len), required=True)
+    firstname = fields.String(validate=validate.Length(max=max_len), required=True)
+    lastname = fields.String(validate=validate.Length(max=max_len), required=True)
+    phone = fields.String(validate=validate.Length(max=max_len), required=True)
+
+
+class InvitedUserSignUpSchema(UserSignUpSchema):
+    signup_code = fields.String(validate=validate.Length(max=max_len))
+
+
+class UserLogInSchema(Schema):
+    email = fields.Email(validate=validate.Length(max=max_len), required=True)
+    password = fields.String(validate=validate.Length(max=max_len), required=True)
+
+
+class UserUpdateSchema(Schema):
+    email = fields.Email(validate=validate.Length(max=max_len))
+    password = fields.String(validate=validate.Length(max=max_len))
+    firstname = fields.String(validate=validate.Length(max=max_len))
+    lastname = fields.String(validate=validate.Length(max=max_len))
+    phone = fields.String(validate=validate.Length(max=max_len))
+
+
+def make_account_blueprint(model, invitable=False):
+    """Sign-up, login and profile routes for an account model. With
+    ``invitable``, accounts created by an invitation import are claimed by
+    signing up with their ``signup_code``."""
+    account_type = model.__name__
+    blueprint = Blueprint(account_type.lower() + '_account', __name__)
+
+    def created(account):
+        db.session.commit()
+        invalidate_user(account_type, account.id)
+        response_cache.bump(*account.cache_versions())
+        return jsonify({
+            'message': '%s created successfully' % account_type,
+            'data': account.serialize(),
+            'token': jwttoken.encode(account.id, account_type)
+        }), 201
+
+    @blueprint.route('/register', methods=['POST'])
+    @parse_args_with_schema(InvitedUserSignUpSchema if invitable else UserSignUpSchema)
+    def register(args):
+        if args.get('signup_code'):
+            account = model.query.filter_by(email=args['email'], signup_code=args['signup_code']).first()
+            if account is None:
+                raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Email not found')
+            account.update(**args)
+            account.signup_code = ''
+            account.set_password(args['password'])
+            return created(account)
+
+        account = model.query.filter_by(email=args['email']).first()
+        if account is not None:
+            raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Duplicated email')
+        account = model(firstname=args['firstname'], lastname=args['lastname'],
+                        email=args['email'], phone=args['phone'])
+        account.set_password(password=args['password'])
+        db.session.add(account)
+        return created(account)
+
+    @blueprint.route('/login', methods=['POST'])
+    @parse_args_with_schema(UserLogInSchema)
+    def login(args):
+        account = model.query.filter_by(email=args['email']).first()
+        if account is None:
+            verify_password(args['password'], None, None)
+        elif account.check_password(args['password']):
+            # Legacy hashes are upgraded in place on a successful login.
+            db.session.commit()
+            return jsonify({
+                'token': jwttoken.encode(account.id, account_type)
+            }), 200
+        raise Error(status_code=StatusCode.UNAUTHORIZED, error_message='Invalid email or password.')
+
+    @blueprint.route('/profile', methods=['PUT'])
+    @parse_args_with_schema(UserUpdateSchema)
+    @token_auth_required
+    def update_profile(user, user_type, args):
+        if user_type != account_type:
+            raise Error(status_code=StatusCode.UNAUTHORIZED, error_message='Invalid token')
+        user.update(**args)
+        if 'password' in args and len(args['password']) > 0:
+            user.set_password(args['password'])
+        db.session.commit()
+        invalidate_user(account_type, user.id)
+        response_cache.bump(*user.cache_versions())
+        return jsonify({
+            'message': '%s updated successfully' % account_type,
+            'data': user.serialize()
+        }), 201
+
+    @blueprint.route('/profile', methods=['GET'])
+    @token_auth_required
+    def get_profile(user, user_type):
+        if user_type != account_type:
+            raise Error(status_code=StatusCode.UNAUTHORIZED, error_message='Invalid token')
+        return jsonify({
+            'result': user.serialize()
+        }), 200
+
+    return blueprint
@@ -2,16 +2,24 @@ import datetime
 import os
 import random
 
-from flask import jsonify, request, send_from_directory
+from flask import Blueprint, request, send_from_directory
 from marshmallow import Schema, fields, validate
 
-from app import app, db, jwttoken, max_len
-from app.common import parse_args_with_schema, token_auth_required
+from app import db, jwttoken, max_len
+from app.cache import response_cache
+from app.common import batch_response, conditional_get, ids_arg, paginate, parse_args_with_schema, \
+    token_auth_optional, token_auth_required
 from app.errors import Error, StatusCode
 from app.helper import allowed_image
+from app.json_provider import jsonify
 from app.models.event import Event
 from app.models.location import Location
-from app.models.organizer import Organizer
+from app.models.reservation import Reservation
+from app.search import facet_counts, match_events, search_terms
+from app.waitlist import notify_promoted, promote_waitlisted
+
+bp = Blueprint('event', __name__)
+images = Blueprint('images', __name__)
 
 
 class EventCreateSchema(Schema):
@@ -36,7 +44,18 @@ class EventUpdateSchema(Schema):
     capacity = fields.Integer()
 
 
-@app.route(app.config['PREFIX'] + '/events/', methods=['POST'])
+class EventRangeSchema(Schema):
+    date_from = fields.Date(load_from='from')
+    date_to = fields.Date(load_from='to')
+
+
+class EventSearchSchema(EventRangeSchema):
+    q = fields.String(validate=validate.Length(max=max_len))
+    category = fields.String(validate=validate.Length(max=max_len))
+    location_id = fields.Integer()
+
+
+@bp.route('/events/', methods=['POST'])
 @parse_args_with_schema(EventCreateSchema)
 @token_auth_required
 def event_create(user, user_type, args):
@@ -70,6 +89,7 @@ def event_create(user, user_type, args):
     
     db.session.add(event)
     db.session.commit()
+    response_cache.bump('events')
 
     return jsonify({
         'message': 'Event created successfully',
@@ -77,7 +97,7 @@ def event_create(user, user_type, args):
     }), 201
 
 
-@app.route(app.config['PREFIX'] + '/events/<int:event_id>', methods=['PUT'])
+@bp.route('/events/<int:event_id>', methods=['PUT'])
 @parse_args_with_schema(EventUpdateSchema)
 @token_auth_required
 def event_update(user, user_type, event_id, args):
@@ -87,14 +107,18 @@ def event_update(user, user_type, event_id, args):
     if event is None:
         raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Event not found')
     event.update(**args)
+    # A raised capacity goes to the waitlist first.
+    promoted = promote_waitlisted(event.id) if 'capacity' in args else []
     db.session.commit()
+    response_cache.bump('events', 'event:%d' % event.id)
+    notify_promoted(event, promoted)
     return jsonify({
         'message': 'Location updated successfully',
         'data': event.serialize()
     }), 201
 
 
-@app.route(app.config['PREFIX'] + '/events/<int:event_id>', methods=['DELETE'])
+@bp.route('/events/<int:event_id>', methods=['DELETE'])
 @token_auth_required
 def event_delete(user, user_type, event_id):
     if user_type != 'Organizer':
@@ -104,35 +128,95 @@ def event_delete(user, user_type, event_id):
         raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Location not found')
     db.session.delete(event)
     db.session.commit()
+    response_cache.bump('events', 'event:%d' % event_id)
     return jsonify({
         'message': 'Event deleted successfully'
     }), 201
 
 
-@app.route(app.config['PREFIX'] + '/events/', methods=['GET'])
-def event_list_all():
-    page = None if request.args.get('page') is None else int(request.args.get('page'))
-    result = Event.query.filter_by(type='public').paginate(page=page, per_page=15)
-    has_next = 'YES'
-    if page is not None and page == (result.total // 15) + 1:
-        has_next = None
-    elif page is None:
-        has_next = None
+def event_list_version():
+    if 'ids' in request.args:
+        # What a batch returns depends on the caller, see event_batch.
+        return None
+    # The versions the cached payload is keyed on, so a cache hit reads no
+    # table at all.
+    return response_cache.versions(['events', 'locations', 'organizers'])
 
-    return jsonify({
-        'current_page': page,
-        'next_page_url': has_next,
-        'data': [{
-            'detail': x.serialize(),
-            'nummber_of_attendees': len(x.reservations),
-            'contact': x.owner.email,
-            'location_name': x.location.name_location,
-            'location_address': x.location.address
-        } for x in result.items]
-    }), 200
-
-
-@app.route(app.config['PREFIX'] + '/events/<int:event_id>', methods=['GET'])
+
+@bp.route('/events/', methods=['GET'])
+@conditional_get(event_list_version)
+@parse_args_with_schema(EventRangeSchema)
+def event_list_all(args):
+    if 'ids' in request.args:
+        return event_batch()
+
+    def build():
+        query = Event.query_with_details().filter(Event.type == 'public')
+        query = Event.filter_start_date(query, args.get('date_from'), args.get('date_to'))
+        items, response = paginate(query, (Event.start_date, Event.id))
+        response['data'] = [Event.serialize_with_details(x) for x in items]
+        return response
+    return jsonify(response_cache.fetch('events:' + request.full_path, ['events', 'locations', 'organizers'],
+                                        build)), 200
+
+
+@bp.route('/events/upcoming', methods=['GET'])
+@parse_args_with_schema(EventRangeSchema)
+def event_list_upcoming(args):
+    # Public events starting from now on (or from ``from`` if later), read
+    # straight off the (type, start_date) index. Cached per minute so events
+    # drop off the list at most a minute after they start.
+    now = datetime.datetime.utcnow().replace(second=0, microsecond=0)
+    start = now
+    if 'date_from' in args and args['date_from'] > now.date():
+        start = args['date_from']
+
+    def build():
+        query = Event.query_with_details().filter(Event.type == 'public')
+        query = Event.filter_start_date(query, start, args.get('date_to'))
+        items, response = paginate(query, (Event.start_date, Event.id))
+        response['data'] = [Event.serialize_with_details(x) for x in items]
+        return response
+    return jsonify(response_cache.fetch('events_upcoming:%s:%s' % (now.isoformat(), request.full_path),
+                                        ['events', 'locations', 'organizers'], build)), 200
+
+
+def visible_events(user, user_type):
+    # Public events, plus the private ones the caller owns or is invited to.
+    if user_type == 'Organizer':
+        return db.or_(Event.type == 'public', Event.owner_id == user.id)
+    if user_type == 'Attendee':
+        reserved = db.session.query(Reservation.event_id).filter(Reservation.attendee_id == user.id)
+        return db.or_(Event.type == 'public', Event.id.in_(reserved))
+    return Event.type == 'public'
+
+
+@bp.route('/events/search', methods=['GET'])
+@parse_args_with_schema(EventSearchSchema)
+@token_auth_optional
+def event_search(user, user_type, args):
+    query = Event.query_with_details().filter(visible_events(user, user_type))
+    terms = search_terms(args.get('q'))
+    if terms:
+        query = query.filter(match_events(terms))
+    if 'category' in args:
+        query = query.filter(Event.category == args['category'])
+    if 'location_id' in args:
+        query = query.filter(Event.location_id == args['location_id'])
+    query = Event.filter_start_date(query, args.get('date_from'), args.get('date_to'))
+
+    def build():
+        items, response = paginate(query, (Event.start_date, Event.id))
+        response['data'] = [Event.serialize_with_details(x) for x in items]
+        response['facets'] = facet_counts(query)
+        return response
+    if user is not None:
+        return jsonify(build()), 200
+    return jsonify(response_cache.fetch('events_search:' + request.full_path, ['events', 'locations', 'organizers'],
+                                        build)), 200
+
+
+@bp.route('/events/<int:event_id>', methods=['GET'])
 @token_auth_required
 def event_get_info(user, user_type, event_id):
     event = Event.query.filter_by(id=event_id).first()
@@ -140,31 +224,40 @@ def event_get_info(user, user_type, event_id):
     if event is None:
         raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Event not found')
     
-    # owner = Organizer.query.filter_by(id=event.owner_id).first()
-    # location = Location.query.filter_by(id=event.location_id).first()
-    
     if event.type == 'private' and user_type == 'Attendee':
-        for re in event.reservations:
-            if re.attendee_id == user.id:
-                return jsonify({'result' : {
-                    'detail': event.serialize(),
-                    'nummber_of_attendees': len(event.reservations),
-                    'contact': event.owner.email,
-                    'location_name': event.location.name_location,
-                    'location_address': event.location.address
-                }}), 200
-        raise Error(status_code=StatusCode.FORBIDDEN, error_message='Permission denied')
-    else:
-        return jsonify({'result': {
-            'detail': event.serialize(),
-            'nummber_of_attendees': len(event.reservations),
-            'contact': event.owner.email,
-            'location_name': event.location.name_location,
-            'location_address': event.location.address
-        }}), 200
+        invited = db.session.query(
+            Reservation.query.filter_by(event_id=event.id, attendee_id=user.id).exists()).scalar()
+        if not invited:
+            raise Error(status_code=StatusCode.FORBIDDEN, error_message='Permission denied')
+
+    result = response_cache.fetch('event:%d' % event.id, ['event:%d' % event.id, 'locations', 'organizers'],
+                                  lambda: {
+                                      'detail': event.serialize(),
+                                      'nummber_of_attendees': event.number_of_attendees,
+                                      'contact': event.owner.email,
+                                      'location_name': event.location.name_location,
+                                      'location_address': event.location.address
+                                  })
+    return jsonify({'result': result}), 200
+
+
+@token_auth_required
+def event_batch(user, user_type):
+    # ``GET /events/?ids=1,2,3``: event_get_info for many events with one
+    # query, and at most one more to check an attendee's private events.
+    ids = ids_arg()
+    rows = Event.query_with_details().filter(Event.id.in_(ids)).all()
+    denied = set()
+    private = [x[0].id for x in rows if x[0].type == 'private']
+    if private and user_type == 'Attendee':
+        invited = db.session.query(Reservation.event_id) \
+            .filter(Reservation.attendee_id == user.id, Reservation.event_id.in_(private))
+        denied = set(private).difference(x for x, in invited)
+    found = {x[0].id: Event.serialize_with_details(x) for x in rows if x[0].id not in denied}
+    return jsonify(batch_response(ids, found, 'Event not found', denied)), 200
 
 
-@app.route(app.config['PREFIX'] + '/events/<int:event_id>/upload', methods=['POST'])
+@bp.route('/events/<int:event_id>/upload', methods=['POST'])
 @token_auth_required
 def event_upload_image(user, user_type, event_id):
     if user_type != 'Organizer':
@@ -183,32 +276,25 @@ def event_upload_image(user, user_type, event_id):
         img.save(os.path.join('uploads', new_file_name))
         event.img = new_file_name
         db.session.commit()
+        response_cache.bump('events', 'event:%d' % event.id)
         return jsonify({'message': 'Image uploaded'}), 201
     else:
         return jsonify({'message': 'Extension not allowed'})
 
 
-@app.route(app.config['PREFIX'] + '/events/organizer_events/', methods=['GET'])
+@bp.route('/events/organizer_events/', methods=['GET'])
 @token_auth_required
 def event_get_by_organizer(user, user_type):
     if user_type != 'Organizer':
         raise Error(status_code=StatusCode.UNAUTHORIZED, error_message='Invalid token')
     
-    result = []
-    for ev in user.events:
-        tmp = {
-            'detail': ev.serialize(),
-            'nummber_of_attendees': len(ev.reservations),
-            'contact': ev.owner.email,
-            'location_name': ev.location.name_location,
-            'location_address': ev.location.address
-        }
-        result.append(tmp)
+    rows = Event.query_with_details().filter(Event.owner_id == user.id).all()
+    result = [Event.serialize_with_details(x) for x in rows]
     
     return jsonify(result), 200
 
 
-@app.route(app.config['PREFIX_FOR_IMG'] + '/uploads/<path:path>', methods=['GET'])
+@images.route('/uploads/<path:path>', methods=['GET'])
 def send_image(path):
     root_dir = os.getcwd()
     return send_from_directory(os.path.join(root_dir, 'uploads'), path)
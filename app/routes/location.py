@@ -1,14 +1,19 @@
 import datetime
 
-from flask import jsonify, request
+from flask import Blueprint, request
 from marshmallow import Schema, fields, validate
 
-from app import app, db, jwttoken, max_len
-from app.common import parse_args_with_schema, token_auth_required
+from app import db, jwttoken, max_len
+from app.cache import response_cache
+from app.common import batch_response, conditional_get, ids_arg, paginate, parse_args_with_schema, \
+    token_auth_required
 from app.errors import Error, StatusCode
+from app.json_provider import jsonify
 from app.models.location import Location
 from app.models.organizer import Organizer
 
+bp = Blueprint('location', __name__)
+
 
 class LocationCreateSchema(Schema):
     name_location = fields.String(validate=validate.Length(max=max_len), required=True)
@@ -20,7 +25,7 @@ class LocationUpdateSchema(Schema):
     address = fields.String(validate=validate.Length(max=max_len))
 
 
-@app.route(app.config['PREFIX'] + '/locations/', methods=['POST'])
+@bp.route('/locations/', methods=['POST'])
 @parse_args_with_schema(LocationCreateSchema)
 @token_auth_required
 def location_create(user, user_type, args):
@@ -36,13 +41,14 @@ def location_create(user, user_type, args):
     )
     db.session.add(location)
     db.session.commit()
+    response_cache.bump('locations', 'location:%d' % location.id)
     return jsonify({
         'message': 'Location created successfully',
         'data': location.serialize()
     }), 201
 
 
-@app.route(app.config['PREFIX'] + '/locations/<int:location_id>/', methods=['PUT'])
+@bp.route('/locations/<int:location_id>/', methods=['PUT'])
 @parse_args_with_schema(LocationUpdateSchema)
 @token_auth_required
 def location_update(user, user_type, location_id, args):
@@ -53,13 +59,14 @@ def location_update(user, user_type, location_id, args):
         raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Location not found')
     location.update(**args)
     db.session.commit()
+    response_cache.bump('locations', 'location:%d' % location.id)
     return jsonify({
         'message': 'Location updated successfully',
         'data': location.serialize()
     }), 201
 
 
-@app.route(app.config['PREFIX'] + '/locations/<int:location_id>/', methods=['DELETE'])
+@bp.route('/locations/<int:location_id>/', methods=['DELETE'])
 @token_auth_required
 def location_delete(user, user_type, location_id):
     if user_type != 'Organizer':
@@ -68,37 +75,45 @@ def location_delete(user, user_type, location_id):
     if location is None:
         raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Location not found')
     
-    events = location.events
-    for e in events:
-        db.session.delete(e)
-    
+    # Events and their reservations go with it through ON DELETE CASCADE.
     db.session.delete(location)
     db.session.commit()
+    response_cache.bump('locations', 'location:%d' % location_id, 'events')
     return jsonify({
         'message': 'Location deleted successfully'
     }), 201
 
 
-@app.route(app.config['PREFIX'] + '/locations/', methods=['GET'])
+def location_list_version():
+    return response_cache.versions(['locations'])
+
+
+def location_version(location_id):
+    return db.session.query(Location.updated).filter(Location.id == location_id).first()
+
+
+@bp.route('/locations/', methods=['GET'])
+@conditional_get(location_list_version)
 def location_list_all():
-    page = None if request.args.get('page') is None else int(request.args.get('page'))
-    result = Location.query.paginate(page=page, per_page=15)
-    has_next = 'YES'
-    if page is not None and page == (result.total // 15) + 1:
-        has_next = None
-    elif page is None:
-        has_next = None
+    ids = ids_arg()
 
-    return jsonify({
-        'current_page': page,
-        'next_page_url': has_next,
-        'locations': [x.serialize() for x in result.items]
-    }), 200
+    def build():
+        if ids is not None:
+            found = {x.id: x.serialize() for x in Location.query.filter(Location.id.in_(ids))}
+            return batch_response(ids, found, 'Location not found')
+        items, response = paginate(Location.query, (Location.id,))
+        response['locations'] = [x.serialize() for x in items]
+        return response
+    return jsonify(response_cache.fetch('locations:' + request.full_path, ['locations'], build)), 200
 
 
-@app.route(app.config['PREFIX'] + '/locations/<int:location_id>/', methods=['GET'])
+@bp.route('/locations/<int:location_id>/', methods=['GET'])
+@conditional_get(location_version)
 def location_get_specific_info(location_id):
-    location = Location.query.filter_by(id=location_id).first()
-    if location is None:
+    def build():
+        location = Location.query.filter_by(id=location_id).first()
+        return None if location is None else location.serialize()
+    result = response_cache.fetch('location:%d' % location_id, ['location:%d' % location_id], build)
+    if result is None:
         raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Location not found')
-    return jsonify({'result': location.serialize()}), 200
+    return jsonify({'result': result}), 200
@@ -0,0 +1,11 @@
+from flask import Blueprint
+
+from app.cache import response_cache
+from app.json_provider import jsonify
+
+bp = Blueprint('metrics', __name__)
+
+
+@bp.route('/metrics/cache', methods=['GET'])
+def cache_metrics():
+    return jsonify({'result': response_cache.stats()}), 200
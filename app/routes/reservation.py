@@ -1,24 +1,45 @@
 from io import StringIO
 import datetime
+import os
 import random
 import string
 
-from flask import jsonify, request
+from flask import Blueprint, Response, request, stream_with_context
 from marshmallow import Schema, fields, validate
+from sqlalchemy.exc import IntegrityError
 
-from app import app, db, jwttoken, max_len
-from app.common import parse_args_with_schema, token_auth_required
-from app.email import send_email
+from app import db, jwttoken, max_len, task_queue
+from app.cache import response_cache
+from app.common import paginate, parse_args_with_schema, token_auth_required
 from app.errors import Error, StatusCode
 from app.helper import allowed_image, allowed_csv
+from app.invitations import count_emails, queue_import
+from app.json_provider import dumps, jsonify
 from app.models.attendee import Attendee
 from app.models.event import Event
 from app.models.location import Location
-from app.models.reservation import Reservation
+from app.models.reservation import COUNTER_COLUMNS, Reservation, write_reservations
+from app.waitlist import commit_or_waitlist, join_waitlist, notify_promoted, promote_waitlisted
 import csv
 
+bp = Blueprint('reservation', __name__)
 
-@app.route(app.config['PREFIX'] + '/reservations/<int:event_id>/confirm', methods=['POST'])
+
+class BulkReservationSchema(Schema):
+    attendee_ids = fields.List(fields.Integer(), required=True, validate=validate.Length(min=1, max=1000))
+
+
+class BulkStatusSchema(BulkReservationSchema):
+    status = fields.String(required=True, validate=validate.OneOf(sorted(COUNTER_COLUMNS)))
+
+
+# Reservations an organizer may move by hand. Taking someone off the waitlist
+# this way skips the queue; putting someone on it is left to the booking
+# routes, which assign the positions.
+BULK_FROM_STATUSES = tuple(COUNTER_COLUMNS) + ('WAITLISTED',)
+
+
+@bp.route('/reservations/<int:event_id>/confirm', methods=['POST'])
 @token_auth_required
 def event_confirm(user, user_type, event_id):
     if user_type != 'Attendee':
@@ -26,26 +47,194 @@ def event_confirm(user, user_type, event_id):
     event = Event.query.filter_by(id=event_id).first()
     if event is None:
         raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Event not found')
-    if datetime.datetime.now() > event.end_date:
+    if datetime.datetime.utcnow() > event.end_date:
         raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Expired event')
     
-    reservations = event.reservations
-    # if len(reservations) == event.capacity:
-    #     raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Out of slot')
-    
     reservation = Reservation.query.filter_by(event_id=event_id, attendee_id=user.id,
                                               status='PENDING').first()
     if reservation is None:
         raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Reservation not found')
-    existing_slots = Reservation.query.filter_by(event_id=event_id, status='INVITED').all()
-    if len(existing_slots) == event.capacity:
-        raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Full slots')
-    reservation.status = 'INVITED'
-    db.session.commit()
+    # A full event puts the attendee on its waitlist instead of turning them
+    # away, they are confirmed when a slot frees up.
+    if event.is_full(status='INVITED'):
+        join_waitlist(reservation)
+    else:
+        reservation.status = 'INVITED'
+    commit_or_waitlist(reservation)
+    response_cache.bump('events', 'event:%d' % event_id)
+    if reservation.status == 'WAITLISTED':
+        return jsonify({'message': 'Waitlisted', 'result': reservation.serialize()}), 202
     return jsonify({'message': 'Confirmed'}), 201
 
 
-@app.route(app.config['PREFIX'] + '/events/<int:event_id>/reservations', methods=['GET'])
+def owned_event(user, user_type, event_id):
+    if user_type != 'Organizer':
+        raise Error(status_code=StatusCode.UNAUTHORIZED, error_message='Invalid token')
+    event = Event.query.filter_by(id=event_id, owner_id=user.id).first()
+    if event is None:
+        raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Event not found')
+    return event
+
+
+def lock_reservations(event_id, attendee_ids):
+    """``{attendee_id: (reservation_id, status)}`` of the given attendees'
+    reservations, locked until the end of the transaction."""
+    rows = db.session.query(Reservation.attendee_id, Reservation.id, Reservation.status) \
+        .filter(Reservation.event_id == event_id, Reservation.attendee_id.in_(attendee_ids)) \
+        .with_for_update()
+    return {attendee_id: (reservation_id, status) for attendee_id, reservation_id, status in rows}
+
+
+def bulk_set_status(event_id, attendee_ids, status, from_statuses):
+    """Move the reservations of ``attendee_ids`` that are in one of
+    ``from_statuses`` to ``status`` with a single UPDATE. The capacity is
+    checked once for the whole batch: FullSlotError leaves every
+    reservation as it was. Returns the per-attendee results and errors."""
+    # A repeated id would be counted once per occurrence but updated once.
+    attendee_ids = list(dict.fromkeys(attendee_ids))
+    current = lock_reservations(event_id, attendee_ids)
+    result, errors, changes = {}, {}, {}
+    for attendee_id in attendee_ids:
+        if attendee_id not in current:
+            errors[attendee_id] = 'Reservation not found'
+            continue
+        reservation_id, old_status = current[attendee_id]
+        if old_status != status and old_status not in from_statuses:
+            errors[attendee_id] = 'Invalid status'
+            continue
+        changes[attendee_id] = old_status
+        result[attendee_id] = {'id': reservation_id, 'status': status, 'event_id': event_id,
+                               'attendee_id': attendee_id}
+    write_reservations(db.session.connection(), event_id, changes, status)
+    return result, errors
+
+
+def bulk_cancel(event_id, attendee_ids):
+    """Delete the reservations of ``attendee_ids`` with a single DELETE.
+    Returns the per-attendee results and errors."""
+    current = lock_reservations(event_id, attendee_ids)
+    result = {attendee_id: {'id': reservation_id, 'status': status, 'event_id': event_id,
+                            'attendee_id': attendee_id}
+              for attendee_id, (reservation_id, status) in current.items()}
+    errors = {x: 'Reservation not found' for x in attendee_ids if x not in current}
+    write_reservations(db.session.connection(), event_id,
+                       {attendee_id: status for attendee_id, (_, status) in current.items()}, None)
+    return result, errors
+
+
+@bp.route('/events/<int:event_id>/reservations/confirm', methods=['POST'])
+@parse_args_with_schema(BulkReservationSchema)
+@token_auth_required
+def reservation_bulk_confirm(user, user_type, event_id, args):
+    event = owned_event(user, user_type, event_id)
+    result, errors = bulk_set_status(event.id, args['attendee_ids'], 'INVITED', BULK_FROM_STATUSES)
+    db.session.commit()
+    response_cache.bump('events', 'event:%d' % event.id)
+    return jsonify({'result': result, 'errors': errors}), 201
+
+
+@bp.route('/events/<int:event_id>/reservations/status', methods=['POST'])
+@parse_args_with_schema(BulkStatusSchema)
+@token_auth_required
+def reservation_bulk_set_status(user, user_type, event_id, args):
+    event = owned_event(user, user_type, event_id)
+    result, errors = bulk_set_status(event.id, args['attendee_ids'], args['status'], BULK_FROM_STATUSES)
+    promoted = promote_waitlisted(event.id)
+    db.session.commit()
+    response_cache.bump('events', 'event:%d' % event.id)
+    notify_promoted(event, promoted)
+    return jsonify({'result': result, 'errors': errors}), 201
+
+
+@bp.route('/events/<int:event_id>/reservations/cancel', methods=['POST'])
+@parse_args_with_schema(BulkReservationSchema)
+@token_auth_required
+def reservation_bulk_cancel(user, user_type, event_id, args):
+    event = owned_event(user, user_type, event_id)
+    result, errors = bulk_cancel(event.id, args['attendee_ids'])
+    promoted = promote_waitlisted(event.id)
+    db.session.commit()
+    response_cache.bump('events', 'event:%d' % event.id)
+    notify_promoted(event, promoted)
+    return jsonify({'result': result, 'errors': errors}), 201
+
+
+def roster_query(event_id):
+    return db.session.query(
+        Reservation.attendee_id, Reservation.status,
+        Attendee.firstname, Attendee.lastname, Attendee.email, Attendee.phone
+    ).join(Attendee, Reservation.attendee_id == Attendee.id) \
+        .filter(Reservation.event_id == event_id)
+
+
+def serialize_roster_row(row):
+    attendee_id, status, firstname, lastname, email, phone = row
+    return {
+        'user': Attendee.serialize_row((attendee_id, firstname, lastname, email, phone)),
+        'status': status,
+        'user_id': attendee_id
+    }
+
+
+def stream_json_array(rows, serialize, chunk_size=1000):
+    # Emit the array piece by piece while the rows are fetched in batches,
+    # so the roster is never held in memory as a whole.
+    yield b'['
+    separator = b''
+    buffer = []
+    for row in rows.yield_per(chunk_size):
+        buffer.append(dumps(serialize(row)))
+        if len(buffer) == chunk_size:
+            yield separator + b','.join(buffer)
+            separator = b','
+            buffer = []
+    yield (separator if buffer else b'') + b','.join(buffer) + b']'
+
+
+def stream_csv(rows, header, chunk_size=1000):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for i, row in enumerate(rows.yield_per(chunk_size), 1):
+        writer.writerow(row)
+        if i % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_ndjson(rows, chunk_size=1000):
+    buffer = []
+    for row in rows.yield_per(chunk_size):
+        buffer.append(dumps(row._asdict()) + b'\n')
+        if len(buffer) == chunk_size:
+            yield b''.join(buffer)
+            buffer = []
+    yield b''.join(buffer)
+
+
+@bp.route('/events/<int:event_id>/reservations/export', methods=['GET'])
+@token_auth_required
+def reservation_export(user, user_type, event_id):
+    event = owned_event(user, user_type, event_id)
+
+    export_format = request.args.get('format', 'csv')
+    rows = roster_query(event.id).order_by(Reservation.attendee_id)
+    if export_format == 'csv':
+        body = stream_csv(rows, [c['name'] for c in rows.column_descriptions])
+        mimetype = 'text/csv'
+    elif export_format == 'ndjson':
+        body = stream_ndjson(rows)
+        mimetype = 'application/x-ndjson'
+    else:
+        raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Invalid format')
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        'Content-Disposition': 'attachment; filename=event-%d-reservations.%s' % (event.id, export_format)
+    })
+
+
+@bp.route('/events/<int:event_id>/reservations', methods=['GET'])
 @token_auth_required
 def attendee_get_by_event(user, user_type, event_id):
     event = Event.query.filter_by(id=event_id).first()
@@ -53,105 +242,105 @@ def attendee_get_by_event(user, user_type, event_id):
         raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Event not found')
     
     if user_type == 'Attendee' and event.type == 'private':
-        found = False
-        for re in event.reservations:
-            if re.attendee_id == user.id:
-                found = True
-        if found is False:
+        invited = db.session.query(
+            Reservation.query.filter_by(event_id=event.id, attendee_id=user.id).exists()).scalar()
+        if not invited:
             raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Permission denied')
+
+    if not {'page', 'after', 'limit'} & set(request.args):
+        rows = roster_query(event.id).order_by(Reservation.attendee_id)
+        return Response(stream_with_context(stream_json_array(rows, serialize_roster_row)),
+                        mimetype='application/json')
+
+    def build():
+        items, response = paginate(roster_query(event.id), (Reservation.attendee_id,))
+        response['data'] = [serialize_roster_row(x) for x in items]
+        return response
     
-    result = []
-    for re in event.reservations:
-        tmp = {}
-        at = re.attendees
-        tmp['user'] = at.serialize()
-        tmp['status'] = re.status
-        tmp['user_id'] = at.id
-        result.append(tmp)
-    
-    return jsonify(result), 200
+    return jsonify(response_cache.fetch('roster:%d:%s' % (event.id, request.full_path),
+                                        ['event:%d' % event.id, 'attendees'], build)), 200
 
 
-@app.route(app.config['PREFIX'] + '/events/<int:event_id>/reservations', methods=['POST'])
+@bp.route('/events/<int:event_id>/reservations', methods=['POST'])
 @token_auth_required
 def event_booking_handle(user, user_type, event_id):
     
     event = Event.query.filter_by(id=event_id).first()
     if event is None:
         raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Event not found')
-    if datetime.datetime.now() > event.end_date:
+    if datetime.datetime.utcnow() > event.end_date:
         raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Expired event')
 
     if event.type == 'public':
         if user_type != 'Attendee':
             raise Error(status_code=StatusCode.UNAUTHORIZED, error_message='Invalid token')
 
-        if len(event.reservations) == event.capacity:
-            raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Full slot')
-        
         reservation = Reservation(status='INVITED', event_id=event.id, attendee_id=user.id)
+        if event.is_full():
+            join_waitlist(reservation)
         db.session.add(reservation)
-        db.session.commit()
+        try:
+            commit_or_waitlist(reservation)
+        except IntegrityError:
+            db.session.rollback()
+            # Only uq_reservations_event_attendee means a second booking; the
+            # constraint name is not in SQLite's message, so look for the row.
+            booked = db.session.query(
+                Reservation.query.filter_by(event_id=event.id, attendee_id=user.id).exists()).scalar()
+            if booked:
+                raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Already booked')
+            raise
+        response_cache.bump('events', 'event:%d' % event.id)
         return jsonify({
             'result': reservation.serialize()
-        }), 201
+        }), 202 if reservation.status == 'WAITLISTED' else 201
     elif event.type == 'private':
-        result = []
         if user_type != 'Organizer':
             raise Error(status_code=StatusCode.UNAUTHORIZED, error_message='Invalid token')
         
         if 'csv_file' not in request.files:
             raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Need csv_file part')
         csv_file = request.files['csv_file']
-        new_file_name = 'tmp/' + ''.join(random.choices(string.ascii_uppercase + string.digits, k=32)) + '.csv'
-        csv_file.save(new_file_name)
         if csv_file.filename == '':
             raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Not selected csv')
-        if csv_file and allowed_csv(csv_file.filename):
-            # csv_reader = csv.reader(open(new_file_name))
-            
-            # row_count = sum(1 for row in csv_reader) - 1
-            # if len(event.reservations) + row_count > event.capacity:
-            #     raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Too many invitations')
-            
-            list_inv = open(new_file_name).read().replace('"', '').split('\n')[1:]
-            if len(event.reservations) + len(list_inv) > event.capacity:
+        if not allowed_csv(csv_file.filename):
+            return jsonify({'message': 'Extension not allowed'})
+        new_file_name = 'tmp/' + ''.join(random.choices(string.ascii_uppercase + string.digits, k=32)) + '.csv'
+        csv_file.save(new_file_name)
+        try:
+            if event.is_full(extra=count_emails(new_file_name)):
                 raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Too many invitations')
-            
-            for row in list_inv:
-                user_mail = row
-                existing_user = Attendee.query.filter_by(email=user_mail).first()
-                if existing_user is not None:
-                    
-                    existing_re = Reservation.query.filter_by(event_id=event.id, attendee_id=user.id).first()
-                    
-                    if existing_re is None:
-                        reservation = Reservation(status='PENDING', event_id=event.id, attendee_id=existing_user.id)
-                        db.session.add(reservation)
-                        db.session.commit()
-                    else:
-                        reservation = existing_re
-                else:
-                    rand_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=32))
-                    link = app.config['URL_MAIL'] + '?signup_code=' + rand_str + '&mail=' + user_mail
-                    new_user = Attendee(firstname='', lastname='', email=user_mail, phone='',
-                                        signup_code=rand_str, password_hash='', password_salt='')
-                    db.session.add(new_user)
-                    db.session.commit()
-                    reservation = Reservation(status='PENDING', event_id=event.id, attendee_id=new_user.id)
-                    db.session.add(reservation)
-                    db.session.commit()
-                    
-                    message = 'Here is your confirm link: {}'.format(link)
-                    send_email(subject='Your confirm link',
-                               recipients=[user_mail], text_body=message, html_body=None)
-                result.append(reservation)
+            job = queue_import(event.id, user.id, new_file_name)
+        except Exception:
+            # Only a queued import job removes its upload.
+            os.remove(new_file_name)
+            raise
         return jsonify({
-            'result': [x.serialize() for x in result]
-        }), 201
+            'message': 'Import started',
+            'job_id': job.id
+        }), 202
 
 
-@app.route(app.config['PREFIX'] + '/events/<int:event_id>/reservations', methods=['DELETE'])
+@bp.route('/imports/<job_id>', methods=['GET'])
+@token_auth_required
+def import_get_status(user, user_type, job_id):
+    if user_type != 'Organizer':
+        raise Error(status_code=StatusCode.UNAUTHORIZED, error_message='Invalid token')
+    job = task_queue.fetch_job(job_id)
+    if job is None or job.meta.get('owner_id') != user.id:
+        raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Import not found')
+    status = job.get_status()
+    return jsonify({'result': {
+        'job_id': job.id,
+        'event_id': job.meta['event_id'],
+        'status': status,
+        'rows_processed': job.meta['rows_processed'],
+        'rows_failed': job.meta['rows_failed'],
+        'reservations': job.result if status == 'finished' else None
+    }}), 200
+
+
+@bp.route('/events/<int:event_id>/reservations', methods=['DELETE'])
 @token_auth_required
 def reservation_delete(user, user_type, event_id):
     if user_type != 'Attendee':
@@ -160,17 +349,18 @@ def reservation_delete(user, user_type, event_id):
     event = Event.query.filter_by(id=event_id).first()
     if event is None:
         raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Event not found')
-    if user_type == 'Attendee' and event.type == 'private':
-        found = False
-        for re in event.reservations:
-            if re.attendee_id == user.id:
-                found = True
-        if found is False:
-            raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Permission denied')
-    
+
+    # Being invited to a private event means holding a reservation, so one
+    # lookup is both the permission check and the row to delete.
     reservation = Reservation.query.filter_by(event_id=event.id, attendee_id=user.id).first()
+    if reservation is None:
+        error_message = 'Permission denied' if event.type == 'private' else 'Reservation not found'
+        raise Error(status_code=StatusCode.BAD_REQUEST, error_message=error_message)
     db.session.delete(reservation)
+    promoted = promote_waitlisted(event.id)
     db.session.commit()
+    response_cache.bump('events', 'event:%d' % event.id)
+    notify_promoted(event, promoted)
     return jsonify({
         'message': 'Reservation deleted successfully'
     }), 201
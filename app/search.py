@@ -0,0 +1,70 @@
+import re
+
+from sqlalchemy import DDL, event
+
+from app import db
+from app.models.event import Event
+
+# Full-text index over the searchable event columns. On SQLite it is an
+# external-content FTS5 table kept in sync by triggers, so every write path
+# (the ORM, bulk statements, ON DELETE CASCADE from a location) updates it.
+# MySQL maintains its FULLTEXT index by itself. The migration creates the
+# same objects for databases built with `flask db upgrade`.
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE events_fts USING fts5("
+    "title, description, category, content='events', content_rowid='id')",
+    "CREATE TRIGGER events_fts_ai AFTER INSERT ON events BEGIN "
+    "INSERT INTO events_fts(rowid, title, description, category) "
+    "VALUES (new.id, new.title, new.description, new.category); END",
+    "CREATE TRIGGER events_fts_ad AFTER DELETE ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, title, description, category) "
+    "VALUES ('delete', old.id, old.title, old.description, old.category); END",
+    "CREATE TRIGGER events_fts_au AFTER UPDATE OF title, description, category ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, title, description, category) "
+    "VALUES ('delete', old.id, old.title, old.description, old.category); "
+    "INSERT INTO events_fts(rowid, title, description, category) "
+    "VALUES (new.id, new.title, new.description, new.category); END",
+]
+MYSQL_FULLTEXT_DDL = 'CREATE FULLTEXT INDEX ix_events_fulltext ON events (title, description, category)'
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(Event.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Event.__table__, 'after_create', DDL(MYSQL_FULLTEXT_DDL).execute_if(dialect='mysql'))
+
+
+def search_terms(q):
+    """Words of a free-text query; punctuation is dropped so user input can
+    never be read as FTS syntax."""
+    return re.findall(r'\w+', q or '', re.UNICODE)
+
+
+def match_events(terms):
+    """Filter matching events containing every term, as a word prefix."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        matches = db.text('SELECT rowid FROM events_fts WHERE events_fts MATCH :fts_query') \
+            .bindparams(fts_query=' '.join('"%s"*' % x for x in terms)) \
+            .columns(db.column('rowid'))
+        return Event.id.in_(matches)
+    if dialect == 'mysql':
+        return db.text('MATCH (events.title, events.description, events.category) '
+                       'AGAINST (:fts_query IN BOOLEAN MODE)') \
+            .bindparams(fts_query=' '.join('+%s*' % x for x in terms))
+    # No full-text index on other backends, fall back to a scan.
+    return db.and_(*[db.or_(Event.title.ilike('%' + x + '%'), Event.description.ilike('%' + x + '%'),
+                            Event.category.ilike('%' + x + '%')) for x in terms])
+
+
+def facet_counts(query):
+    """Per-category and per-type counts of the events matched by ``query``.
+    This is a second query, grouped over the same filters as the page, so
+    the counts cover every match and not just the page returned."""
+    rows = query.with_entities(Event.category, Event.type, db.func.count(Event.id)) \
+        .group_by(Event.category, Event.type).order_by(None).all()
+    facets = {'category': {}, 'type': {}}
+    for category, type_, count in rows:
+        facets['category'][category] = facets['category'].get(category, 0) + count
+        facets['type'][type_] = facets['type'].get(type_, 0) + count
+    return {name: [{'value': value, 'count': count}
+                   for value, count in sorted(counts.items(), key=lambda x: (-x[1], str(x[0])))]
+            for name, counts in facets.items()}
@@ -0,0 +1,81 @@
+from flask import current_app
+from flask_mail import Message
+
+from app import db
+from app.email import send_emails
+from app.errors import FullSlotError
+from app.models.attendee import Attendee
+from app.models.event import Event
+from app.models.reservation import Reservation, write_reservations
+
+
+def next_position(event_id):
+    # A seek to the end of ix_reservations_event_id_status_position. Two
+    # attendees joining at once may share a position, the id breaks the tie.
+    with db.session.no_autoflush:
+        last = db.session.query(db.func.max(Reservation.position)) \
+            .filter(Reservation.event_id == event_id, Reservation.status == 'WAITLISTED').scalar()
+    return (last or 0) + 1
+
+
+def join_waitlist(reservation):
+    position = next_position(reservation.event_id)
+    reservation.status = 'WAITLISTED'
+    reservation.position = position
+
+
+def commit_or_waitlist(reservation):
+    """Commit the session, or when the capacity check of ``reservation``
+    fails because the last slot went to a concurrent request, put it on the
+    waitlist and commit that instead."""
+    try:
+        db.session.commit()
+    except FullSlotError:
+        db.session.rollback()
+        if db.inspect(reservation).transient:
+            # The rolled back INSERT leaves its primary key on the object,
+            # another booking may have been given that id since.
+            reservation.id = None
+        join_waitlist(reservation)
+        db.session.add(reservation)
+        db.session.commit()
+
+
+def promote_waitlisted(event_id):
+    """Confirm the first waitlisted reservations of the event, as many as it
+    has free slots, in the current transaction. Returns the emails of the
+    promoted attendees, for notify_promoted once committed."""
+    event = db.session.query(Event.capacity, Event.invited_count) \
+        .filter(Event.id == event_id).with_for_update().first()
+    if event is None:
+        return []
+    capacity, invited_count = event
+    query = db.session.query(Reservation.attendee_id, Attendee.email) \
+        .join(Attendee, Reservation.attendee_id == Attendee.id) \
+        .filter(Reservation.event_id == event_id, Reservation.status == 'WAITLISTED') \
+        .order_by(Reservation.position, Reservation.id) \
+        .with_for_update()
+    if capacity is not None:
+        if invited_count >= capacity:
+            return []
+        query = query.limit(capacity - invited_count)
+    rows = query.all()
+    if not rows:
+        return []
+    try:
+        write_reservations(db.session.connection(), event_id,
+                           {attendee_id: 'WAITLISTED' for attendee_id, _ in rows}, 'INVITED')
+    except FullSlotError:
+        # Taken meanwhile by a concurrent request, nothing was changed. The
+        # next release of a slot promotes them.
+        return []
+    return [email for _, email in rows]
+
+
+def notify_promoted(event, emails):
+    messages = [Message(subject='You are off the waitlist', sender=current_app.config['EMAIL_SENDER'],
+                        recipients=[email],
+                        body='A place opened up in {}, your reservation is confirmed.'.format(event.title))
+                for email in emails]
+    if messages:
+        send_emails(messages)
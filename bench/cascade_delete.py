@@ -0,0 +1,64 @@
+"""Time deleting a location with a large fixture of events and reservations.
+
+    python bench/cascade_delete.py [--events 2000] [--attendees 100]
+
+Seeds a scratch SQLite database with one location holding ``--events``
+events, each booked by ``--attendees`` attendees, then deletes the
+location through DELETE /locations/<id>/. Prints the time taken, the SQL
+statements the app sent, and the rows left behind, which must be none.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import event as sqlalchemy_event
+
+from common import print_table, scratch_app, seed_attendees, seed_events, seed_owner, seed_reservations
+
+from app import db, jwttoken
+from app.models.event import Event
+from app.models.reservation import Reservation
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--attendees', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = scratch_app(os.path.join(directory, 'bench.db'))
+        with app.app_context():
+            owner_id, location_id = seed_owner()
+            events = seed_events(args.events, owner_id, location_id)
+            attendees = seed_attendees(args.attendees)
+            seed_reservations((e, a) for e in events for a in attendees)
+            token = jwttoken.encode(owner_id, 'Organizer')
+            engine = db.engine
+            db.session.remove()
+
+        statements = []
+
+        def record(connection, cursor, statement, parameters, context, executemany):
+            statements.append(' '.join(statement.split()))
+
+        client = app.test_client()
+        sqlalchemy_event.listen(engine, 'before_cursor_execute', record)
+        start = time.perf_counter()
+        response = client.delete(app.config['PREFIX'] + '/locations/%d/' % location_id,
+                                 headers={'Authorization': 'Bearer ' + token})
+        elapsed = time.perf_counter() - start
+        sqlalchemy_event.remove(engine, 'before_cursor_execute', record)
+        assert response.status_code == 201, response.get_json()
+
+        with app.app_context():
+            left = (db.session.query(Event).count(), db.session.query(Reservation).count())
+
+    print('%d events, %d reservations deleted in %.3f s' % (len(events), len(events) * len(attendees), elapsed))
+    print_table(('#', 'statement'), [(i, x[:100]) for i, x in enumerate(statements, 1)])
+    print('left behind: %d events, %d reservations' % left)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Shared setup for the benchmark scripts: a scratch app on its own SQLite
+database, bulk seeding straight through the tables, and timing helpers.
+
+The scripts are run from anywhere, e.g. ``python bench/load_test.py``; they
+put the project root on sys.path themselves.
+"""
+import datetime
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import create_app, db  # noqa: E402
+from app.models.attendee import Attendee  # noqa: E402
+from app.models.event import Event  # noqa: E402
+from app.models.location import Location  # noqa: E402
+from app.models.organizer import Organizer  # noqa: E402
+from app.models.reservation import Reservation, rebuild_reservation_counters  # noqa: E402
+from config import Config  # noqa: E402
+
+BATCH_SIZE = 10000
+
+
+def database_uri(path):
+    return 'sqlite:///' + os.path.abspath(path)
+
+
+def scratch_app(path, **overrides):
+    """An app on a fresh SQLite database at ``path``, caching in memory and
+    sending no mail. ``overrides`` are extra config settings."""
+    if os.path.exists(path):
+        os.remove(path)
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_uri(path)
+        SQLALCHEMY_POOL_SIZE = None
+        SQLALCHEMY_MAX_OVERFLOW = None
+        SQLALCHEMY_POOL_TIMEOUT = None
+        CACHE_BACKEND = 'memory'
+        MAIL_SUPPRESS_SEND = True
+
+    for key, value in overrides.items():
+        setattr(BenchConfig, key, value)
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def insert_rows(table, rows):
+    """Insert ``rows`` into ``table`` in batches of BATCH_SIZE, bypassing the
+    ORM, and return the ids given to them."""
+    first = (db.session.query(db.func.max(table.c.id)).scalar() or 0) + 1
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            db.session.execute(table.insert(), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+        count += len(batch)
+    db.session.commit()
+    return range(first, first + count)
+
+
+def seed_owner():
+    """An organizer with one location. Returns their ids."""
+    now = datetime.datetime.utcnow()
+    organizer_id, = insert_rows(Organizer.__table__, [{
+        'email': 'organizer@example.com', 'firstname': 'Org', 'lastname': 'Anizer', 'phone': '1',
+        'password_hash': '', 'password_salt': '', 'created': now, 'updated': now
+    }])
+    location_id, = insert_rows(Location.__table__, [{
+        'name_location': 'Hall', 'address': 'Main st', 'owner_id': organizer_id, 'created': now, 'updated': now
+    }])
+    return organizer_id, location_id
+
+
+def seed_events(count, owner_id, location_id, type='public', capacity=None, start=None):
+    """``count`` events a minute apart from ``start``. Returns their ids."""
+    now = datetime.datetime.utcnow()
+    start = start or datetime.datetime(2099, 1, 1)
+    return insert_rows(Event.__table__, ({
+        'title': 'Event %d' % i, 'description': 'About event %d' % i, 'category': 'talk',
+        'start_date': start + datetime.timedelta(minutes=i), 'end_date': start + datetime.timedelta(days=1000),
+        'owner_id': owner_id, 'location_id': location_id, 'type': type, 'capacity': capacity,
+        'created': now, 'updated': now
+    } for i in range(count)))
+
+
+def seed_attendees(count, password_hash='', password_salt=''):
+    """``count`` attendees, ``attendee<i>@example.com``. Returns their ids."""
+    now = datetime.datetime.utcnow()
+    return insert_rows(Attendee.__table__, ({
+        'email': 'attendee%d@example.com' % i, 'firstname': 'A', 'lastname': str(i), 'phone': '1',
+        'password_hash': password_hash, 'password_salt': password_salt, 'signup_code': '',
+        'created': now, 'updated': now
+    } for i in range(count)))
+
+
+def seed_reservations(pairs, status='INVITED'):
+    """Reservations for ``(event_id, attendee_id)`` pairs, with the event
+    counters rebuilt afterwards."""
+    now = datetime.datetime.utcnow()
+    insert_rows(Reservation.__table__, ({
+        'status': status, 'event_id': event_id, 'attendee_id': attendee_id, 'created': now, 'updated': now
+    } for event_id, attendee_id in pairs))
+    rebuild_reservation_counters()
+
+
+def timed(f, repeat=5):
+    """Median wall time of ``repeat`` calls of ``f``, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float('nan')
+
+
+def print_table(header, rows):
+    widths = [max(len(str(x)) for x in column) for column in zip(header, *rows)]
+    for row in [header] + list(rows):
+        print('  '.join(str(x).ljust(width) for x, width in zip(row, widths)).rstrip())
@@ -0,0 +1,74 @@
+"""Measure guest list import throughput in rows/second.
+
+    python bench/invite_import.py [--rows 2000] [--known 0.5]
+
+Writes a CSV guest list of ``--rows`` addresses, the ``--known`` share of
+them belonging to existing attendees, and imports it into a private event
+with invite_from_csv, the body of the RQ import job. Each run gets a fresh
+database. The chunk size of 1 is the per-row baseline, a round trip set
+and commit per guest like the original per-row loop.
+"""
+import argparse
+import csv
+import os
+import tempfile
+
+from common import print_table, scratch_app, seed_attendees, seed_events, seed_owner, timed
+
+from app import db
+from app.invitations import CHUNK_SIZE, invite_from_csv
+from app.models.reservation import Reservation
+
+
+class DiscardingQueue(object):
+    """Takes the batched invitation emails instead of Redis."""
+
+    def __init__(self):
+        self.jobs = 0
+
+    def enqueue(self, f, *args, **kwargs):
+        self.jobs += 1
+
+
+def write_guest_list(path, rows, known):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['email'])
+        for i in range(rows):
+            # seed_attendees names its attendees attendee<i>@example.com.
+            writer.writerow(['attendee%d@example.com' % i if i < rows * known else 'guest%d@example.com' % i])
+
+
+def run(directory, rows, known, chunk_size):
+    app = scratch_app(os.path.join(directory, 'bench.db'))
+    app.extensions['task_queue'] = queue = DiscardingQueue()
+    path = os.path.join(directory, 'guests.csv')
+    write_guest_list(path, rows, known)
+    with app.app_context():
+        owner_id, location_id = seed_owner()
+        event_id, = seed_events(1, owner_id, location_id, type='private', capacity=rows)
+        seed_attendees(int(rows * known))
+        elapsed = timed(lambda: invite_from_csv(event_id, path, chunk_size=chunk_size), repeat=1)
+        invited = db.session.query(Reservation).filter_by(event_id=event_id).count()
+        db.session.remove()
+    assert invited == rows, invited
+    return elapsed, queue.jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--known', type=float, default=0.5)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for chunk_size in (1, 100, CHUNK_SIZE):
+            elapsed, jobs = run(directory, args.rows, args.known, chunk_size)
+            rows.append((chunk_size, '%.2f' % elapsed, '%.0f' % (args.rows / elapsed), jobs))
+    print('%d rows, %d%% known attendees' % (args.rows, args.known * 100))
+    print_table(('chunk size', 'seconds', 'rows/s', 'email jobs'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""Load test the list and booking endpoints under each serving profile.
+
+    python bench/load_test.py [--profile flask] [--profile uwsgi]
+                              [--clients 16] [--duration 10]
+
+Every profile serves its own scratch SQLite database, seeded with public
+events and attendees. Keep-alive client threads then call, for
+``--duration`` seconds each:
+
+- list: GET /events/?page=N over random pages
+- booking: POST /events/<id>/reservations, a new (event, attendee) pair
+  per request
+
+The script prints requests/second and latency percentiles per profile and
+endpoint, and how often the server dropped a kept-alive connection (the
+request is then retried on a new one). Profiles:
+
+- flask: ``flask run --with-threads`` in debug mode, as start_server.sh
+- uwsgi: ``uwsgi --ini uwsgi.ini``, the production profile
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from common import ROOT, database_uri, percentile, print_table, scratch_app, seed_attendees, seed_events, \
+    seed_owner
+
+from app import db, jwttoken
+
+PORT = 5077
+EVENTS = 300
+ATTENDEES = 1000
+PER_PAGE = 15
+
+PROFILES = {
+    'flask': [sys.executable, '-m', 'flask', 'run', '--with-threads', '--port', str(PORT)],
+    'uwsgi': ['uwsgi', '--ini', 'uwsgi.ini', '--http', ':%d' % PORT],
+}
+
+
+def server_env(path, profile):
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=database_uri(path), CACHE_BACKEND='memory', FLASK_APP='run.py')
+    if profile == 'flask':
+        env['FLASK_DEBUG'] = '1'
+    return env
+
+
+def seed(path):
+    app = scratch_app(path)
+    with app.app_context():
+        owner_id, location_id = seed_owner()
+        events = list(seed_events(EVENTS, owner_id, location_id))
+        attendees = list(seed_attendees(ATTENDEES))
+        tokens = [jwttoken.encode(x, 'Attendee') for x in attendees]
+        db.session.remove()
+    return app.config['PREFIX'], events, tokens
+
+
+def wait_until_up(prefix, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit('server exited with %d' % process.returncode)
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', PORT, timeout=5)
+            connection.request('GET', prefix + '/events/?page=1')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit('server did not start within %d s' % timeout)
+
+
+def run_clients(clients, duration, request):
+    """Call ``request(connection)`` from ``clients`` threads for ``duration``
+    seconds. Returns the latencies of the successful calls, the number of
+    failed ones, and how often the server closed a kept-alive connection."""
+    latencies = []
+    counts = {'failed': 0, 'reconnects': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        connection = http.client.HTTPConnection('127.0.0.1', PORT, timeout=30)
+        mine, failed, reconnects = [], 0, 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                ok = request(connection)
+            except (OSError, http.client.HTTPException):
+                # Closed by the server since the last response: the new
+                # connection is part of this request's latency.
+                connection.close()
+                reconnects += 1
+                try:
+                    ok = request(connection)
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    ok = False
+            if ok:
+                mine.append(time.perf_counter() - start)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(mine)
+            counts['failed'] += failed
+            counts['reconnects'] += reconnects
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, counts['failed'], counts['reconnects']
+
+
+def list_request(prefix):
+    pages = -(-EVENTS // PER_PAGE)
+
+    def request(connection):
+        connection.request('GET', prefix + '/events/?page=%d' % random.randint(1, pages))
+        response = connection.getresponse()
+        response.read()
+        return response.status == 200
+    return request
+
+
+def booking_request(prefix, events, tokens):
+    # Every request books a pair nobody booked before.
+    pairs = itertools.count()
+
+    def request(connection):
+        i = next(pairs)
+        event_id = events[i // len(tokens) % len(events)]
+        connection.request('POST', prefix + '/events/%d/reservations' % event_id, body=b'',
+                           headers={'Authorization': 'Bearer ' + tokens[i % len(tokens)]})
+        response = connection.getresponse()
+        body = response.read()
+        if response.status != 201:
+            print('  booking failed: %d %s' % (response.status, json.loads(body or b'{}')), file=sys.stderr)
+        return response.status == 201
+    return request
+
+
+def run_profile(profile, clients, duration, directory):
+    path = os.path.join(directory, profile + '.db')
+    prefix, events, tokens = seed(path)
+    process = subprocess.Popen(PROFILES[profile], cwd=ROOT, env=server_env(path, profile),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(prefix, process)
+        rows = []
+        for name, request in (('list', list_request(prefix)), ('booking', booking_request(prefix, events, tokens))):
+            latencies, failed, reconnects = run_clients(clients, duration, request)
+            rows.append((profile, name, len(latencies), '%.0f' % (len(latencies) / duration),
+                         '%.1f' % (percentile(latencies, 0.5) * 1000), '%.1f' % (percentile(latencies, 0.99) * 1000),
+                         failed, reconnects))
+        return rows
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--profile', action='append', choices=sorted(PROFILES),
+                        help='profile to test, repeatable (default: all)')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in args.profile or sorted(PROFILES):
+            rows += run_profile(profile, args.clients, args.duration, directory)
+    print('%d clients, %g s per endpoint' % (args.clients, args.duration))
+    print_table(('profile', 'endpoint', 'requests', 'req/s', 'p50 ms', 'p99 ms', 'failed', 'reconnects'), rows)
+
+
+if __name__ == '__main__':
+    main()
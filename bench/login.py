@@ -0,0 +1,84 @@
+"""Measure login throughput, and what a login storm does to other requests.
+
+    python bench/login.py [--threads 8] [--duration 5] [--iterations 260000]
+
+For each PASSWORD_HASH_WORKERS setting (0 hashes inline on the request
+thread), ``--threads`` threads log attendees in as fast as they can while
+one more thread polls GET /locations/. Prints logins/second and the
+latency of the concurrent reads.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from common import percentile, print_table, scratch_app, seed_attendees
+
+from app import passwords
+from app.passwords import hash_password
+
+PASSWORD = 'correct horse'
+
+
+def run(directory, workers, threads, duration, iterations):
+    app = scratch_app(os.path.join(directory, 'bench.db'), PASSWORD_HASH_WORKERS=workers,
+                      PASSWORD_ITERATIONS=iterations)
+    prefix = app.config['PREFIX']
+    with app.app_context():
+        salt, password_hash = hash_password(PASSWORD)
+        attendees = len(seed_attendees(threads * 10, password_hash=password_hash, password_salt=salt))
+
+    logins = []
+    reads = []
+    deadline = time.monotonic() + duration
+
+    def log_in(first):
+        client = app.test_client()
+        i = first
+        while time.monotonic() < deadline:
+            response = client.post(prefix + '/attendees/login', json={
+                'email': 'attendee%d@example.com' % (i % attendees), 'password': PASSWORD})
+            assert response.status_code == 200, response.get_json()
+            logins.append(1)
+            i += threads
+
+    def read():
+        client = app.test_client()
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            assert client.get(prefix + '/locations/?page=1').status_code == 200
+            reads.append(time.perf_counter() - start)
+
+    running = [threading.Thread(target=log_in, args=(i,)) for i in range(threads)]
+    running.append(threading.Thread(target=read))
+    for thread in running:
+        thread.start()
+    for thread in running:
+        thread.join()
+    if passwords._pool is not None:
+        # The pool is sized once per process; start over for the next run.
+        passwords._pool.shutdown()
+        passwords._pool = None
+    return ('inline' if not workers else 'pool of %d' % workers, '%.1f' % (len(logins) / duration),
+            '%.1f' % (percentile(reads, 0.5) * 1000), '%.1f' % (percentile(reads, 0.99) * 1000), len(reads))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--iterations', type=int, default=260000)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in sorted({0, 1, os.cpu_count()}):
+            rows.append(run(directory, workers, args.threads, args.duration, args.iterations))
+    print('%d login threads, %d PBKDF2 iterations, %d CPUs, %g s per run' % (
+        args.threads, args.iterations, os.cpu_count(), args.duration))
+    print_table(('hashing', 'logins/s', 'read p50 ms', 'read p99 ms', 'reads'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Compare offset and cursor pagination latency from the first page to the
+last.
+
+    python bench/pagination.py [--events 1000000]
+
+Seeds a scratch SQLite database with ``--events`` public events and times
+GET /events/ pages of 15 at several depths, with ?page=N and with
+?after=<cursor>&limit=15. The response cache is invalidated before every
+request, so each one runs its queries.
+"""
+import argparse
+import os
+import tempfile
+
+from common import print_table, scratch_app, seed_events, seed_owner, timed
+
+from app import db
+from app.cache import response_cache
+from app.common import encode_cursor
+from app.models.event import Event
+
+PER_PAGE = 15
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--events', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = scratch_app(os.path.join(directory, 'bench.db'))
+        client = app.test_client()
+        url = app.config['PREFIX'] + '/events/'
+        with app.app_context():
+            owner_id, location_id = seed_owner()
+            seed_events(args.events, owner_id, location_id)
+            db.session.execute('ANALYZE')
+            db.session.commit()
+
+        def get(query):
+            def request():
+                with app.app_context():
+                    response_cache.bump('events')
+                response = client.get(url + query)
+                assert response.status_code == 200, response.get_json()
+            return timed(request, args.repeat) * 1000
+
+        rows = []
+        pages = -(-args.events // PER_PAGE)
+        for page in sorted({1, 10, pages // 2, pages}):
+            offset = (page - 1) * PER_PAGE
+            with app.app_context():
+                # The key of the last row of the previous page.
+                key = db.session.query(Event.start_date, Event.id).filter(Event.type == 'public') \
+                    .order_by(Event.start_date, Event.id).offset(offset - 1).first() if offset else None
+            cursor = '?after=%s&limit=%d' % (encode_cursor(key), PER_PAGE) if key else '?limit=%d' % PER_PAGE
+            rows.append((page, '%.1f' % get('?page=%d' % page), '%.1f' % get(cursor)))
+
+    print('%d public events, median of %d requests per cell' % (args.events, args.repeat))
+    print_table(('page', 'offset ms', 'cursor ms'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Measure the cost of serializing /events/-style payloads.
+
+    python bench/serialize.py [--repeat 20]
+
+Builds 15, 500 and 10k event rows as the event listings load them and times
+Event.serialize_with_details plus jsonify for each size:
+
+- original: the mktime(timetuple()) epochs and flask.jsonify
+- current: helper.to_epoch and app.json_provider.jsonify with orjson
+- stdlib: the same with the json module fallback used without orjson
+"""
+import argparse
+import datetime
+import importlib.util
+import sys
+import time
+
+import flask
+
+from common import print_table, timed
+
+from app import create_app, json_provider
+from app.models.event import Event
+
+SIZES = (15, 500, 10000)
+
+
+def stdlib_provider():
+    """app.json_provider as loaded when orjson is not installed."""
+    saved = sys.modules.get('orjson')
+    sys.modules['orjson'] = None
+    try:
+        spec = importlib.util.find_spec('app.json_provider')
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        if saved is None:
+            del sys.modules['orjson']
+        else:
+            sys.modules['orjson'] = saved
+    assert module.orjson is None
+    return module
+
+
+def original_serialize(event):
+    return {
+        'id': event.id,
+        'title': event.title,
+        'description': event.description,
+        'start_date': int(time.mktime(event.start_date.timetuple())),
+        'end_date': int(time.mktime(event.end_date.timetuple())),
+        'location_id': event.location_id,
+        'owner_id': event.owner_id,
+        'category': event.category,
+        'img': event.img,
+        'type': event.type,
+        'capacity': event.capacity
+    }
+
+
+def original_serialize_with_details(row):
+    event, contact, location_name, location_address, number_of_attendees = row
+    return {
+        'detail': original_serialize(event),
+        'nummber_of_attendees': number_of_attendees,
+        'contact': contact,
+        'location_name': location_name,
+        'location_address': location_address
+    }
+
+
+def make_rows(count):
+    start = datetime.datetime(2099, 1, 1)
+    return [(Event(id=i, title='Event %d' % i, description='About event %d' % i, category='talk',
+                   start_date=start + datetime.timedelta(minutes=i), end_date=start + datetime.timedelta(days=1),
+                   location_id=1, owner_id=1, type='public', capacity=100),
+             'organizer@example.com', 'Hall', 'Main st', i % 100) for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app()
+    variants = (
+        ('original', original_serialize_with_details, flask.jsonify),
+        ('current', Event.serialize_with_details, json_provider.jsonify),
+        ('stdlib', Event.serialize_with_details, stdlib_provider().jsonify),
+    )
+    rows = []
+    with app.test_request_context():
+        for size in SIZES:
+            items = make_rows(size)
+            row = [size]
+            for _, serialize, jsonify in variants:
+                def run():
+                    jsonify({'data': [serialize(x) for x in items], 'current_page': 1, 'next_page_url': 'YES'})
+                row.append('%.2f' % (timed(run, args.repeat) * 1000))
+            rows.append(row)
+    print('milliseconds per payload, median of %d' % args.repeat)
+    print_table(['events'] + [name + ' ms' for name, _, _ in variants], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,11 +12,33 @@ class Config(object):
     SECRET_KEY = os.getenv('SECRET_KEY') or 'app-secret-key'
     SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI') or 'sqlite:///' + os.path.join(basedir, 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool per worker process. SQLite keeps Flask-SQLAlchemy's
+    # NullPool, its connections can't be shared between threads anyway.
+    _pooled = not SQLALCHEMY_DATABASE_URI.startswith('sqlite')
+    SQLALCHEMY_POOL_SIZE = int(os.getenv('SQLALCHEMY_POOL_SIZE') or 10) if _pooled else None
+    SQLALCHEMY_MAX_OVERFLOW = int(os.getenv('SQLALCHEMY_MAX_OVERFLOW') or 10) if _pooled else None
+    SQLALCHEMY_POOL_TIMEOUT = int(os.getenv('SQLALCHEMY_POOL_TIMEOUT') or 10) if _pooled else None
+    SQLALCHEMY_POOL_RECYCLE = int(os.getenv('SQLALCHEMY_POOL_RECYCLE') or 3600)
+    SQLALCHEMY_POOL_PRE_PING = (os.getenv('SQLALCHEMY_POOL_PRE_PING') or '1') == '1'
     JWT_SECRET = os.getenv('JWT_SECRET') or 'jwt-secret-key'
+    AUTH_CACHE_SIZE = int(os.getenv('AUTH_CACHE_SIZE') or 1024)
+    AUTH_CACHE_TTL = int(os.getenv('AUTH_CACHE_TTL') or 60)
+    PASSWORD_ITERATIONS = int(os.getenv('PASSWORD_ITERATIONS') or 260000)
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS') or os.cpu_count())
+    HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE') or 0)
     MAIL_SERVER = os.getenv('MAIL_SERVER') or 'smtp.googlemail.com'
     MAIL_PORT = os.getenv('MAIL_PORT') or 587
     MAIL_USE_TLS = os.getenv('MAIL_USE_TLS') or 1
     MAIL_USERNAME = os.getenv('MAIL_USERNAME') or 'hiepxo9x@gmail.com'
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD') or 'Hoanghiep10'
     EMAIL_SENDER = os.getenv('EMAIL_SENDER') or 'haha@yopmail.com'
+    MAIL_BATCH_SIZE = int(os.getenv('MAIL_BATCH_SIZE') or 100)
+    MAIL_RATE_LIMIT = float(os.getenv('MAIL_RATE_LIMIT') or 0)
+    MAIL_MAX_RETRIES = int(os.getenv('MAIL_MAX_RETRIES') or 3)
+    MAIL_RETRY_BACKOFF = float(os.getenv('MAIL_RETRY_BACKOFF') or 1)
     REDIS_URL = os.getenv('REDIS_URL') or 'redis://'
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND') or 'redis'
+    CACHE_TTL = int(os.getenv('CACHE_TTL') or 300)
+    CACHE_MEMORY_SIZE = int(os.getenv('CACHE_MEMORY_SIZE') or 10000)
+    IMPORT_JOB_TIMEOUT = int(os.getenv('IMPORT_JOB_TIMEOUT') or 3600)
+    IMPORT_RESULT_TTL = int(os.getenv('IMPORT_RESULT_TTL') or 86400)
@@ -0,0 +1,44 @@
+"""cascade deletes
+
+Revision ID: 036fac1149ab
+Revises: bad1937f8c5c
+Create Date: 2026-10-17 12:07:34.393876
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '036fac1149ab'
+down_revision = 'bad1937f8c5c'
+branch_labels = None
+depends_on = None
+
+
+# SQLite keeps foreign keys unnamed, batch mode names the reflected ones
+# with this convention so they can be dropped and recreated.
+naming_convention = {
+    'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'
+}
+
+
+def replace_foreign_key(table, column, referred, ondelete=None):
+    name = 'fk_%s_%s_%s' % (table, column, referred)
+    existing = [fk['name'] for fk in sa.inspect(op.get_bind()).get_foreign_keys(table)
+                if fk['constrained_columns'] == [column]]
+    with op.batch_alter_table(table, naming_convention=naming_convention) as batch_op:
+        batch_op.drop_constraint(existing[0] or name, type_='foreignkey')
+        batch_op.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    replace_foreign_key('events', 'location_id', 'locations', ondelete='CASCADE')
+    replace_foreign_key('reservations', 'event_id', 'events', ondelete='CASCADE')
+    replace_foreign_key('reservations', 'attendee_id', 'attendees', ondelete='CASCADE')
+
+
+def downgrade():
+    replace_foreign_key('reservations', 'attendee_id', 'attendees')
+    replace_foreign_key('reservations', 'event_id', 'events')
+    replace_foreign_key('events', 'location_id', 'locations')
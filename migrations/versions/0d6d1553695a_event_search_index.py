@@ -0,0 +1,63 @@
+"""event search index
+
+Revision ID: 0d6d1553695a
+Revises: 036fac1149ab
+Create Date: 2026-10-17 12:30:53.949615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0d6d1553695a'
+down_revision = '036fac1149ab'
+branch_labels = None
+depends_on = None
+
+
+# An external-content FTS5 table over events, kept in sync by triggers.
+# Note that a batch_alter_table on events recreates the table on SQLite and
+# drops these triggers, such a migration has to create them again.
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE events_fts USING fts5("
+    "title, description, category, content='events', content_rowid='id')",
+    "CREATE TRIGGER events_fts_ai AFTER INSERT ON events BEGIN "
+    "INSERT INTO events_fts(rowid, title, description, category) "
+    "VALUES (new.id, new.title, new.description, new.category); END",
+    "CREATE TRIGGER events_fts_ad AFTER DELETE ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, title, description, category) "
+    "VALUES ('delete', old.id, old.title, old.description, old.category); END",
+    "CREATE TRIGGER events_fts_au AFTER UPDATE OF title, description, category ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, title, description, category) "
+    "VALUES ('delete', old.id, old.title, old.description, old.category); "
+    "INSERT INTO events_fts(rowid, title, description, category) "
+    "VALUES (new.id, new.title, new.description, new.category); END",
+    "INSERT INTO events_fts(events_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER events_fts_au",
+    "DROP TRIGGER events_fts_ad",
+    "DROP TRIGGER events_fts_ai",
+    "DROP TABLE events_fts",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == 'mysql':
+        op.create_index('ix_events_fulltext', 'events', ['title', 'description', 'category'],
+                        mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect == 'mysql':
+        op.drop_index('ix_events_fulltext', table_name='events')
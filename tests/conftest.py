@@ -0,0 +1,105 @@
+import datetime
+
+import pytest
+
+from app import create_app, db, jwttoken
+from app.models.attendee import Attendee
+from config import Config
+
+
+class RecordedJob(object):
+    """What RecordingQueue.enqueue returns in place of an rq Job."""
+
+    def __init__(self, id, meta):
+        self.id = id
+        self.meta = meta
+
+
+class RecordingQueue(object):
+    """Stands in for the RQ queue: records jobs instead of sending them to
+    Redis."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def enqueue(self, f, *args, **kwargs):
+        self.jobs.append((f, args, kwargs))
+        return RecordedJob(str(len(self.jobs)), kwargs.get('meta', {}))
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        # A file rather than :memory:, so every thread gets the same database.
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.db')
+        SQLALCHEMY_POOL_SIZE = None
+        SQLALCHEMY_MAX_OVERFLOW = None
+        SQLALCHEMY_POOL_TIMEOUT = None
+        CACHE_BACKEND = 'memory'
+        PASSWORD_ITERATIONS = 1000
+        PASSWORD_HASH_WORKERS = 0
+        MAIL_SUPPRESS_SEND = True
+
+    app = create_app(TestConfig)
+    app.extensions['task_queue'] = RecordingQueue()
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def auth(token):
+    return {'Authorization': 'Bearer ' + token}
+
+
+@pytest.fixture
+def organizer(app, client):
+    """Token of a registered organizer owning one location, and the
+    location id."""
+    prefix = app.config['PREFIX']
+    response = client.post(prefix + '/organizers/register', json={
+        'email': 'organizer@example.com', 'password': 'secret',
+        'firstname': 'Org', 'lastname': 'Anizer', 'phone': '1'
+    })
+    token = response.get_json()['token']
+    response = client.post(prefix + '/locations/', json={'name_location': 'Hall', 'address': 'Main st'},
+                           headers=auth(token))
+    return token, response.get_json()['data']['id']
+
+
+@pytest.fixture
+def make_event(app, client, organizer):
+    def make_event(title='Event', type='public', capacity=None, start_date='2099-01-01', category='talk'):
+        token, location_id = organizer
+        response = client.post(app.config['PREFIX'] + '/events/', json={
+            'title': title, 'description': 'About ' + title, 'category': category,
+            'start_date': start_date, 'end_date': '2099-01-02',
+            'location_id': location_id, 'type': type, 'capacity': capacity
+        }, headers=auth(token))
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()['data']['id']
+    return make_event
+
+
+@pytest.fixture
+def make_attendees(app):
+    """Insert ``count`` attendees directly and return their ids and tokens."""
+    def make_attendees(count):
+        now = datetime.datetime.utcnow()
+        with app.app_context():
+            first = db.session.query(db.func.count(Attendee.id)).scalar()
+            db.session.execute(Attendee.__table__.insert(), [{
+                'email': 'attendee%d@example.com' % i, 'firstname': 'A', 'lastname': str(i), 'phone': '1',
+                'password_hash': '', 'password_salt': '', 'signup_code': '', 'created': now, 'updated': now
+            } for i in range(first, first + count)])
+            db.session.commit()
+            ids = [x for x, in db.session.query(Attendee.id).order_by(Attendee.id).offset(first)]
+            return [(x, jwttoken.encode(x, 'Attendee')) for x in ids]
+    return make_attendees
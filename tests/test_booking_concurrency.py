@@ -0,0 +1,93 @@
+import threading
+from collections import Counter
+
+from app import db
+from app.errors import FullSlotError
+from app.models.event import Event
+from app.models.reservation import Reservation, adjust_counter
+from conftest import auth
+
+CLIENTS = 30
+CAPACITY = 5
+
+
+def run_concurrently(targets):
+    """Start one thread per callable, released together, and return their
+    results."""
+    barrier = threading.Barrier(len(targets))
+    results = [None] * len(targets)
+
+    def run(i, target):
+        barrier.wait()
+        results[i] = target()
+
+    threads = [threading.Thread(target=run, args=(i, x)) for i, x in enumerate(targets)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def reservation_state(app, event_id):
+    with app.app_context():
+        statuses = Counter(x for x, in db.session.query(Reservation.status).filter_by(event_id=event_id))
+        event = db.session.query(Event).get(event_id)
+        return statuses, event.pending_count, event.invited_count
+
+
+def test_concurrent_slot_claims_never_exceed_capacity(app, make_event):
+    event_id = make_event(capacity=CAPACITY)
+
+    def claim():
+        with app.app_context():
+            try:
+                adjust_counter(db.session.connection(), event_id, 'INVITED', 1)
+                db.session.commit()
+                return True
+            except FullSlotError:
+                db.session.rollback()
+                return False
+            finally:
+                db.session.remove()
+
+    results = run_concurrently([claim] * CLIENTS)
+    assert results.count(True) == CAPACITY
+    assert reservation_state(app, event_id)[2] == CAPACITY
+
+
+def test_concurrent_bookings_never_overbook(app, make_event, make_attendees):
+    event_id = make_event(capacity=CAPACITY)
+    attendees = make_attendees(CLIENTS)
+    url = app.config['PREFIX'] + '/events/%d/reservations' % event_id
+
+    def book(token):
+        return lambda: app.test_client().post(url, headers=auth(token)).status_code
+
+    codes = Counter(run_concurrently([book(token) for _, token in attendees]))
+    # Every attendee gets either a slot or a place on the waitlist.
+    assert codes == {201: CAPACITY, 202: CLIENTS - CAPACITY}
+    statuses, pending_count, invited_count = reservation_state(app, event_id)
+    assert statuses == {'INVITED': CAPACITY, 'WAITLISTED': CLIENTS - CAPACITY}
+    assert (pending_count, invited_count) == (0, CAPACITY)
+
+
+def test_concurrent_confirmations_never_overbook(app, make_event, make_attendees):
+    event_id = make_event(type='private', capacity=CLIENTS)
+    attendees = make_attendees(CLIENTS)
+    with app.app_context():
+        for attendee_id, _ in attendees:
+            db.session.add(Reservation(status='PENDING', event_id=event_id, attendee_id=attendee_id))
+        db.session.commit()
+        db.session.query(Event).filter_by(id=event_id).update({'capacity': CAPACITY})
+        db.session.commit()
+    url = app.config['PREFIX'] + '/reservations/%d/confirm' % event_id
+
+    def confirm(token):
+        return lambda: app.test_client().post(url, headers=auth(token)).status_code
+
+    codes = Counter(run_concurrently([confirm(token) for _, token in attendees]))
+    assert codes == {201: CAPACITY, 202: CLIENTS - CAPACITY}
+    statuses, pending_count, invited_count = reservation_state(app, event_id)
+    assert statuses == {'INVITED': CAPACITY, 'WAITLISTED': CLIENTS - CAPACITY}
+    assert (pending_count, invited_count) == (0, CAPACITY)
@@ -0,0 +1,105 @@
+import pytest
+
+from app import db
+from app.models.event import Event
+from app.models.reservation import Reservation, rebuild_reservation_counters
+from conftest import auth
+
+
+@pytest.fixture
+def roster(app, make_event, make_attendees):
+    """A private event for four, and four attendees holding PENDING
+    reservations to it."""
+    event_id = make_event(type='private', capacity=4)
+    attendees = [x for x, _ in make_attendees(4)]
+    with app.app_context():
+        for attendee_id in attendees:
+            db.session.add(Reservation(status='PENDING', event_id=event_id, attendee_id=attendee_id))
+        db.session.commit()
+    return event_id, attendees
+
+
+def set_capacity(app, event_id, capacity):
+    with app.app_context():
+        db.session.query(Event).filter_by(id=event_id).update({'capacity': capacity})
+        db.session.commit()
+
+
+def post(app, client, organizer, event_id, action, body):
+    url = app.config['PREFIX'] + '/events/%d/reservations/%s' % (event_id, action)
+    return client.post(url, json=body, headers=auth(organizer[0]))
+
+
+def counters(app, event_id):
+    """The event's (pending_count, invited_count), checked against a count
+    of its reservations."""
+    with app.app_context():
+        event = db.session.query(Event).get(event_id)
+        kept = event.pending_count, event.invited_count
+        rebuild_reservation_counters()
+        db.session.refresh(event)
+        assert (event.pending_count, event.invited_count) == kept
+        return kept
+
+
+def statuses(app, event_id):
+    with app.app_context():
+        return dict(db.session.query(Reservation.attendee_id, Reservation.status).filter_by(event_id=event_id))
+
+
+def test_bulk_confirm(app, client, organizer, roster):
+    event_id, (a, b, c, d) = roster
+    response = post(app, client, organizer, event_id, 'confirm', {'attendee_ids': [a, b, 999]})
+    assert response.status_code == 201
+    body = response.get_json()
+    assert sorted(body['result']) == [str(a), str(b)]
+    assert body['errors'] == {'999': 'Reservation not found'}
+    assert counters(app, event_id) == (2, 2)
+    assert statuses(app, event_id) == {a: 'INVITED', b: 'INVITED', c: 'PENDING', d: 'PENDING'}
+
+
+def test_bulk_confirm_counts_repeated_ids_once(app, client, organizer, roster):
+    event_id, (a, b, c, d) = roster
+    response = post(app, client, organizer, event_id, 'confirm', {'attendee_ids': [a, a, a]})
+    assert response.status_code == 201
+    assert counters(app, event_id) == (3, 1)
+
+
+def test_bulk_confirm_over_capacity_changes_nothing(app, client, organizer, roster):
+    event_id, attendees = roster
+    set_capacity(app, event_id, 3)
+    response = post(app, client, organizer, event_id, 'confirm', {'attendee_ids': attendees})
+    assert response.status_code == 400
+    assert counters(app, event_id) == (4, 0)
+    assert set(statuses(app, event_id).values()) == {'PENDING'}
+
+
+def test_bulk_status(app, client, organizer, roster):
+    event_id, (a, b, c, d) = roster
+    assert post(app, client, organizer, event_id, 'confirm', {'attendee_ids': [a, b]}).status_code == 201
+    response = post(app, client, organizer, event_id, 'status',
+                    {'attendee_ids': [a, a, b, c], 'status': 'PENDING'})
+    assert response.status_code == 201
+    assert response.get_json()['errors'] == {}
+    assert counters(app, event_id) == (4, 0)
+    assert set(statuses(app, event_id).values()) == {'PENDING'}
+
+
+def test_bulk_cancel(app, client, organizer, roster):
+    event_id, (a, b, c, d) = roster
+    assert post(app, client, organizer, event_id, 'confirm', {'attendee_ids': [a]}).status_code == 201
+    response = post(app, client, organizer, event_id, 'cancel', {'attendee_ids': [a, b, b, 999]})
+    assert response.status_code == 201
+    assert response.get_json()['errors'] == {'999': 'Reservation not found'}
+    assert counters(app, event_id) == (2, 0)
+    assert statuses(app, event_id) == {c: 'PENDING', d: 'PENDING'}
+
+
+def test_bulk_endpoints_need_the_owner(app, client, roster, make_attendees):
+    event_id, attendees = roster
+    (_, token), = make_attendees(1)
+    for action in ('confirm', 'cancel'):
+        response = client.post(app.config['PREFIX'] + '/events/%d/reservations/%s' % (event_id, action),
+                               json={'attendee_ids': attendees}, headers=auth(token))
+        assert response.status_code == 401
+    assert counters(app, event_id) == (4, 0)
@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models.event import Event
+from app.models.reservation import Reservation
+from conftest import auth
+
+
+@pytest.fixture
+def venues(app, client, organizer, make_attendees):
+    """Two locations with two events each, every event booked by the same
+    three attendees."""
+    token, hall = organizer
+    prefix = app.config['PREFIX']
+    response = client.post(prefix + '/locations/', json={'name_location': 'Annex', 'address': 'Side st'},
+                           headers=auth(token))
+    annex = response.get_json()['data']['id']
+    events = {hall: [], annex: []}
+    for location_id, ids in events.items():
+        for i in range(2):
+            response = client.post(prefix + '/events/', json={
+                'title': 'Event %d at %d' % (i, location_id), 'description': '', 'category': 'talk',
+                'start_date': '2099-01-01', 'end_date': '2099-01-02',
+                'location_id': location_id, 'type': 'public', 'capacity': 10
+            }, headers=auth(token))
+            ids.append(response.get_json()['data']['id'])
+    attendees = [x for x, _ in make_attendees(3)]
+    with app.app_context():
+        for event_id in events[hall] + events[annex]:
+            for attendee_id in attendees:
+                db.session.add(Reservation(status='INVITED', event_id=event_id, attendee_id=attendee_id))
+        db.session.commit()
+    return hall, annex, events
+
+
+def remaining(app):
+    with app.app_context():
+        return (sorted(x for x, in db.session.query(Event.id)),
+                sorted(x for x, in db.session.query(Reservation.event_id)))
+
+
+def test_foreign_keys_are_enforced(app):
+    with app.app_context():
+        assert db.session.execute('PRAGMA foreign_keys').scalar() == 1
+
+
+def test_location_delete_cascades_without_loading_rows(app, client, organizer, venues):
+    hall, annex, events = venues
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        statements.append(' '.join(statement.split()))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.delete(app.config['PREFIX'] + '/locations/%d/' % hall, headers=auth(organizer[0]))
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code == 201
+
+    event_ids, reservation_event_ids = remaining(app)
+    assert event_ids == events[annex]
+    assert reservation_event_ids == sorted(events[annex] * 3)
+    # The location itself is the only row loaded or deleted by the app.
+    touched = [x for x in statements if x.startswith(('SELECT', 'DELETE'))
+               and ('FROM events' in x or 'FROM reservations' in x)]
+    assert touched == []
+    assert [x for x in statements if x.startswith('DELETE')] == ['DELETE FROM locations WHERE locations.id = ?']
+
+
+def test_event_delete_removes_its_reservations(app, client, organizer, venues):
+    hall, annex, events = venues
+    response = client.delete(app.config['PREFIX'] + '/events/%d' % events[hall][0], headers=auth(organizer[0]))
+    assert response.status_code == 201
+    event_ids, reservation_event_ids = remaining(app)
+    assert events[hall][0] not in event_ids
+    assert events[hall][0] not in reservation_event_ids
+    assert len(reservation_event_ids) == 9
@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds for importing the package and building the app in a fresh
+# interpreter. Measured around 400 ms; raise it on slow machines with
+# COLD_START_BUDGET_MS rather than here.
+BUDGET_MS = float(os.getenv('COLD_START_BUDGET_MS') or 1000)
+
+# Only the commands and backends that use them may load these.
+DEFERRED = ('alembic', 'flask_migrate', 'redis', 'rq')
+
+SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+create_app()
+print(json.dumps({'elapsed_ms': (time.perf_counter() - start) * 1000,
+                  'loaded': sorted(x for x in %r if x in sys.modules)}))
+''' % (DEFERRED,)
+
+
+def cold_start(cache_backend):
+    env = dict(os.environ, CACHE_BACKEND=cache_backend)
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', SCRIPT], cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True)
+    imports = []
+    for line in process.stderr.splitlines():
+        if line.startswith('import time:') and 'self [us]' not in line:
+            _, cumulative, name = line[len('import time:'):].split('|')
+            imports.append((int(cumulative) / 1000, name.strip()))
+    return json.loads(process.stdout.splitlines()[-1]), imports
+
+
+@pytest.mark.parametrize('cache_backend', ['memory', 'redis'])
+def test_cold_start_within_budget(cache_backend):
+    result, imports = cold_start(cache_backend)
+    assert result['loaded'] == []
+    slowest = sorted(imports, reverse=True)[:10]
+    assert result['elapsed_ms'] < BUDGET_MS, 'cold start took %.0f ms, slowest imports: %s' % (
+        result['elapsed_ms'], ', '.join('%s %.0f ms' % (name, ms) for ms, name in slowest))
@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import event
+
+from app import db
+from conftest import auth
+
+
+@pytest.fixture
+def statements(app):
+    """The SQL statements run while the test goes on."""
+    recorded = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        recorded.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    yield recorded
+    event.remove(engine, 'before_cursor_execute', record)
+
+
+@pytest.mark.parametrize('path, table', [
+    ('/events/?limit=2', 'events'),
+    ('/locations/?limit=2', 'locations'),
+    ('/organizers/1/events?limit=2', 'events'),
+])
+def test_cached_listing_skips_the_table(app, client, make_event, statements, path, table):
+    for i in range(3):
+        make_event('Event %d' % i, capacity=10)
+    url = app.config['PREFIX'] + path
+    first = client.get(url)
+    assert first.status_code == 200
+    del statements[:]
+
+    again = client.get(url)
+    assert again.status_code == 200
+    assert again.get_data() == first.get_data()
+    # At most a lookup by primary key, such as the owner's, is left.
+    assert not [x for x in statements if 'FROM ' + table in x]
+
+    fresh = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+    assert fresh.status_code == 304
+    assert not [x for x in statements if 'FROM ' + table in x]
+
+
+def test_listing_etag_changes_with_the_data(app, client, organizer, make_event):
+    event_id = make_event('Before', capacity=10)
+    url = app.config['PREFIX'] + '/events/?limit=2'
+    etag = client.get(url).headers['ETag']
+    response = client.put(app.config['PREFIX'] + '/events/%d' % event_id, json={'title': 'After'},
+                          headers=auth(organizer[0]))
+    assert response.status_code == 201
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['data'][0]['detail']['title'] == 'After'
@@ -0,0 +1,165 @@
+import contextlib
+import smtplib
+import socket
+import threading
+import time
+import warnings
+
+import pytest
+from flask_mail import Message
+
+from app import mail
+from app.email import send_emails, send_emails_async
+
+
+class FakeConnection(object):
+    """Raises the queued error, if any, for each recipient's first send."""
+
+    def __init__(self, errors, sent):
+        self.errors = errors
+        self.sent = sent
+
+    def send(self, message):
+        error = self.errors.pop(message.recipients[0], None)
+        if error is not None:
+            raise error
+        self.sent.append(message.recipients[0])
+
+
+@pytest.fixture
+def smtp(app, monkeypatch):
+    state = {'errors': {}, 'sent': [], 'connections': 0}
+
+    @contextlib.contextmanager
+    def connect():
+        state['connections'] += 1
+        yield FakeConnection(state['errors'], state['sent'])
+
+    monkeypatch.setattr(mail, 'connect', connect)
+    app.config['MAIL_RETRY_BACKOFF'] = 0
+    return state
+
+
+def messages(*recipients):
+    return [Message(subject='Hi', sender='from@example.com', recipients=[x], body='Hi') for x in recipients]
+
+
+def test_rejected_messages_are_skipped(app, smtp):
+    smtp['errors'].update({
+        'b@example.com': smtplib.SMTPRecipientsRefused({'b@example.com': (550, b'No such user')}),
+        'c@example.com': smtplib.SMTPDataError(554, b'Message rejected'),
+        'd@example.com': smtplib.SMTPSenderRefused(553, b'Sender refused', 'from@example.com'),
+    })
+    with app.app_context():
+        send_emails_async(messages('a@example.com', 'b@example.com', 'c@example.com', 'd@example.com',
+                                   'e@example.com'))
+    assert smtp['sent'] == ['a@example.com', 'e@example.com']
+    assert smtp['connections'] == 1
+
+
+def test_dropped_connection_is_reopened(app, smtp):
+    smtp['errors'].update({
+        'b@example.com': smtplib.SMTPServerDisconnected('Connection unexpectedly closed'),
+        'c@example.com': ConnectionResetError(),
+    })
+    with app.app_context():
+        send_emails_async(messages('a@example.com', 'b@example.com', 'c@example.com'))
+    assert smtp['sent'] == ['a@example.com', 'b@example.com', 'c@example.com']
+    assert smtp['connections'] == 3
+
+
+class Sink(object):
+    """A local SMTP server on a background thread that records which
+    connection delivered each message, and when."""
+
+    def __init__(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', DeprecationWarning)
+            smtpd = pytest.importorskip('smtpd')
+        import asyncore
+        sink = self
+        self.connections = 0
+        self.received = []
+        self.map = {}
+
+        class Server(smtpd.SMTPServer):
+            def handle_accepted(self, conn, addr):
+                sink.connections += 1
+                super().handle_accepted(conn, addr)
+
+            def process_message(self, peer, mailfrom, rcpttos, data, **kwargs):
+                sink.received.append((peer, rcpttos[0], time.monotonic()))
+
+        self.server = Server(('127.0.0.1', 0), None, map=self.map, decode_data=True)
+        self.port = self.server.socket.getsockname()[1]
+        self.running = True
+        self.thread = threading.Thread(target=self.serve, args=(asyncore,), daemon=True)
+        self.thread.start()
+
+    def serve(self, asyncore):
+        while self.running:
+            asyncore.loop(timeout=0.01, map=self.map, count=1)
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        for channel in list(self.map.values()):
+            channel.close()
+
+
+def use_server(app, port):
+    app.extensions['mail'] = mail.init_mail({'MAIL_SERVER': '127.0.0.1', 'MAIL_PORT': port,
+                                             'MAIL_SUPPRESS_SEND': False})
+
+
+@pytest.fixture
+def sink(app):
+    sink = Sink()
+    use_server(app, sink.port)
+    yield sink
+    sink.close()
+
+
+def test_one_connection_per_batch(app, sink, record_property):
+    app.config['MAIL_BATCH_SIZE'] = 50
+    recipients = ['guest%d@example.com' % i for i in range(200)]
+    with app.app_context():
+        start = time.perf_counter()
+        send_emails(messages(*recipients), _async=False)
+        elapsed = time.perf_counter() - start
+    assert [x[1] for x in sink.received] == recipients
+    assert sink.connections == 4
+    # Each batch arrives over a connection of its own.
+    peers = [x[0] for x in sink.received]
+    assert [len(set(peers[i:i + 50])) for i in range(0, 200, 50)] == [1, 1, 1, 1]
+    assert len(set(peers)) == 4
+    record_property('messages_per_second', round(len(recipients) / elapsed))
+    print('%.0f messages/s over %d connections' % (len(recipients) / elapsed, sink.connections))
+
+
+def test_sends_are_spaced_by_rate_limit(app, sink):
+    app.config['MAIL_RATE_LIMIT'] = 20
+    with app.app_context():
+        send_emails_async(messages(*('guest%d@example.com' % i for i in range(5))))
+    times = [x[2] for x in sink.received]
+    assert len(times) == 5
+    assert sink.connections == 1
+    # The sink stamps messages as it reads them, a little after they were
+    # sent, so leave some slack under the 50 ms interval.
+    assert min(b - a for a, b in zip(times, times[1:])) > 0.04
+
+
+def test_gives_up_after_max_retries(app, monkeypatch):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    # Nothing listens there now, so every connect is refused.
+    use_server(app, port)
+    app.config['MAIL_MAX_RETRIES'] = 3
+    app.config['MAIL_RETRY_BACKOFF'] = 0.5
+    sleeps = []
+    monkeypatch.setattr('app.email.time.sleep', sleeps.append)
+    with app.app_context():
+        with pytest.raises(ConnectionRefusedError):
+            send_emails_async(messages('a@example.com'))
+    assert sleeps == [0.5, 1.0, 2.0]
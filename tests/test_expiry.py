@@ -0,0 +1,47 @@
+import datetime
+import time
+
+import pytest
+
+from conftest import auth
+
+from app import db
+from app.models.event import Event
+
+
+@pytest.fixture
+def behind_utc(monkeypatch):
+    """Run with the local clock twelve hours behind UTC (POSIX zone names
+    have the sign flipped)."""
+    monkeypatch.setenv('TZ', 'Etc/GMT+12')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.fixture
+def ended_event(app, make_event):
+    """A public event that ended an hour ago in UTC; end dates are stored
+    in UTC."""
+    event_id = make_event(capacity=10)
+    with app.app_context():
+        event = Event.query.get(event_id)
+        event.start_date = datetime.datetime.utcnow() - datetime.timedelta(days=1)
+        event.end_date = datetime.datetime.utcnow() - datetime.timedelta(hours=1)
+        db.session.commit()
+    return event_id
+
+
+def test_booking_an_ended_event(app, client, make_attendees, ended_event, behind_utc):
+    (_, token), = make_attendees(1)
+    response = client.post(app.config['PREFIX'] + '/events/%d/reservations' % ended_event, headers=auth(token))
+    assert response.status_code == 400
+    assert response.get_json()['error_message'] == 'Expired event'
+
+
+def test_confirming_for_an_ended_event(app, client, make_attendees, ended_event, behind_utc):
+    (_, token), = make_attendees(1)
+    response = client.post(app.config['PREFIX'] + '/reservations/%d/confirm' % ended_event, headers=auth(token))
+    assert response.status_code == 400
+    assert response.get_json()['error_message'] == 'Expired event'
@@ -0,0 +1,114 @@
+import os
+
+import pytest
+from fakeredis import FakeStrictRedis
+from rq import Queue, SimpleWorker
+
+from conftest import auth
+
+from app import db, invitations
+from app.errors import Error, StatusCode
+from app.models.event import Event
+from app.models.reservation import Reservation
+
+
+@pytest.fixture
+def queue(app, tmp_path, monkeypatch):
+    """A real RQ queue on fakeredis. Uploads are saved under tmp/ relative
+    to the working directory, so run in a scratch one."""
+    connection = FakeStrictRedis()
+    queue = Queue('flask', connection=connection)
+    app.extensions['redis'] = connection
+    app.extensions['task_queue'] = queue
+    (tmp_path / 'tmp').mkdir()
+    monkeypatch.chdir(tmp_path)
+    return queue
+
+
+def work(app, queue):
+    # Inside the test app's context, so the job writes to the test database.
+    with app.app_context():
+        SimpleWorker([queue], connection=queue.connection).work(burst=True)
+
+
+def upload(app, client, token, event_id, emails):
+    with open('guests.csv', 'w') as f:
+        f.write('email\n' + ''.join(x + '\n' for x in emails))
+    with open('guests.csv', 'rb') as f:
+        return client.post(app.config['PREFIX'] + '/events/%d/reservations' % event_id,
+                           data={'csv_file': (f, 'guests.csv')}, headers=auth(token))
+
+
+def test_import_job(app, client, organizer, make_event, queue):
+    token, _ = organizer
+    event_id = make_event(type='private', capacity=10)
+    emails = ['guest%d@example.com' % i for i in range(4)]
+
+    response = upload(app, client, token, event_id, emails)
+    assert response.status_code == 202, response.get_json()
+    job_id = response.get_json()['job_id']
+    uploads = os.listdir('tmp')
+    assert len(uploads) == 1
+
+    url = app.config['PREFIX'] + '/imports/' + job_id
+    result = client.get(url, headers=auth(token)).get_json()['result']
+    assert result == {'job_id': job_id, 'event_id': event_id, 'status': 'queued',
+                      'rows_processed': 0, 'rows_failed': 0, 'reservations': None}
+
+    work(app, queue)
+
+    result = client.get(url, headers=auth(token)).get_json()['result']
+    assert result['status'] == 'finished'
+    assert (result['rows_processed'], result['rows_failed']) == (4, 0)
+    with app.app_context():
+        expected = [x.serialize() for x in Reservation.query.filter_by(event_id=event_id)]
+        assert Event.query.get(event_id).pending_count == 4
+    assert len(expected) == 4
+    assert sorted(result['reservations'], key=lambda x: x['id']) == sorted(expected, key=lambda x: x['id'])
+    assert {x['status'] for x in result['reservations']} == {'PENDING'}
+    # The job removes its upload.
+    assert os.listdir('tmp') == []
+
+
+def test_import_job_counts_failed_rows(app, client, organizer, make_event, queue, monkeypatch):
+    token, _ = organizer
+    event_id = make_event(type='private', capacity=10)
+    read_emails = invitations.read_emails
+    invite_chunk = invitations.invite_chunk
+
+    def invite_or_fail(event_id, emails):
+        if 'bad@example.com' in emails:
+            raise Error(status_code=StatusCode.BAD_REQUEST, error_message='Full slot')
+        return invite_chunk(event_id, emails)
+
+    monkeypatch.setattr(invitations, 'read_emails', lambda path, chunk_size=2: read_emails(path, 2))
+    monkeypatch.setattr(invitations, 'invite_chunk', invite_or_fail)
+
+    response = upload(app, client, token, event_id, ['a@example.com', 'b@example.com', 'c@example.com',
+                                                     'bad@example.com', 'e@example.com'])
+    assert response.status_code == 202, response.get_json()
+    work(app, queue)
+
+    result = client.get(app.config['PREFIX'] + '/imports/' + response.get_json()['job_id'],
+                        headers=auth(token)).get_json()['result']
+    assert result['status'] == 'finished'
+    # Chunks of two: the chunk holding bad@ fails as a whole.
+    assert (result['rows_processed'], result['rows_failed']) == (3, 2)
+    with app.app_context():
+        emails = {x.attendees.email for x in Reservation.query.filter_by(event_id=event_id)}
+        db.session.remove()
+    assert emails == {'a@example.com', 'b@example.com', 'e@example.com'}
+    assert len(result['reservations']) == 3
+    assert os.listdir('tmp') == []
+
+
+def test_import_status_of_another_organizer(app, client, organizer, make_event, queue):
+    token, _ = organizer
+    event_id = make_event(type='private', capacity=10)
+    job_id = upload(app, client, token, event_id, ['a@example.com']).get_json()['job_id']
+    other = client.post(app.config['PREFIX'] + '/organizers/register', json={
+        'email': 'other@example.com', 'password': 'secret', 'firstname': 'O', 'lastname': 'Ther', 'phone': '2'
+    }).get_json()['token']
+    response = client.get(app.config['PREFIX'] + '/imports/' + job_id, headers=auth(other))
+    assert response.status_code == 400
+    assert response.get_json()['error_message'] == 'Import not found'
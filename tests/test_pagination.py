@@ -0,0 +1,41 @@
+import pytest
+
+from app import db
+from app.models.event import Event
+
+
+@pytest.fixture
+def events(app, make_event):
+    """Five public events, the first two without a start date."""
+    ids = [make_event('Event %d' % i, capacity=10, start_date='2099-01-0%d' % (5 - i)) for i in range(5)]
+    with app.app_context():
+        db.session.query(Event).filter(Event.id.in_(ids[:2])).update({'start_date': None},
+                                                                     synchronize_session=False)
+        db.session.commit()
+    return ids
+
+
+def event_ids(body):
+    if 'events' in body:
+        return [x['id'] for x in body['events']]
+    return [x['detail']['id'] for x in body['data']]
+
+
+@pytest.mark.parametrize('path', ['/events/', '/organizers/1/events'])
+@pytest.mark.parametrize('limit', [1, 2, 3])
+def test_keyset_pages_cover_null_keys(app, client, events, path, limit):
+    seen = []
+    url = app.config['PREFIX'] + path + '?limit=%d' % limit
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        seen += event_ids(body)
+        url = body['next_page_url']
+    assert seen == events[:2] + events[:1:-1]
+
+
+def test_cursor_rejects_null_for_non_nullable_keys(app, client, events):
+    from app.common import encode_cursor
+    response = client.get(app.config['PREFIX'] + '/events/?after=' + encode_cursor([None, None]))
+    assert response.status_code == 400
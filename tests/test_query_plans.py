@@ -0,0 +1,118 @@
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models.reservation import Reservation
+from conftest import auth
+
+# Every route with the tables it may read in full: the unfiltered listings
+# walk the table in primary-key order.
+ROUTES = [
+    ('GET', '/events/?page=1', 'attendee', ()),
+    ('GET', '/events/?limit=1&from=2000-01-01&to=2100-01-01', 'attendee', ()),
+    ('GET', '/events/upcoming?to=2100-01-01', None, ()),
+    ('GET', '/events/search?q=public&from=2000-01-01', None, ()),
+    ('GET', '/events/search?q=private&category=talk', 'attendee', ()),
+    ('GET', '/events/search?q=private', 'organizer', ()),
+    ('GET', '/events/?ids={public},{private}', 'attendee', ()),
+    ('GET', '/events/organizer_events/', 'organizer', ()),
+    ('GET', '/events/{public}', 'attendee', ()),
+    ('GET', '/events/{private}', 'attendee', ()),
+    ('GET', '/events/{public}/reservations', 'attendee', ()),
+    ('GET', '/events/{private}/reservations?limit=1', 'attendee', ()),
+    ('GET', '/events/{public}/reservations/export?format=ndjson', 'organizer', ()),
+    ('GET', '/attendees/{attendee}/public_events', 'attendee', ()),
+    ('GET', '/attendees/{attendee}/private_events', 'attendee', ()),
+    ('GET', '/locations/?page=1', None, ('locations',)),
+    ('GET', '/locations/?limit=1', None, ('locations',)),
+    ('GET', '/locations/?ids={location}', None, ()),
+    ('GET', '/locations/{location}/', None, ()),
+    ('GET', '/organizers?page=1', None, ('organizers',)),
+    ('GET', '/organizers?ids={organizer}', None, ()),
+    ('GET', '/organizers/{organizer}', None, ()),
+    ('GET', '/organizers/{organizer}/locations/?limit=5', None, ()),
+    ('GET', '/organizers/{organizer}/events?limit=5&from=2000-01-01', None, ()),
+    ('GET', '/attendees/profile', 'attendee', ()),
+    ('POST', '/events/{public}/reservations', 'other', ()),
+    ('POST', '/reservations/{private}/confirm', 'attendee', ()),
+    ('POST', '/events/{private}/reservations/confirm', 'organizer', ()),
+    ('POST', '/events/{private}/reservations/status', 'organizer', ()),
+    ('POST', '/events/{public}/reservations/cancel', 'organizer', ()),
+    ('DELETE', '/events/{public}/reservations', 'attendee', ()),
+    ('PUT', '/events/{public}', 'organizer', ()),
+    ('DELETE', '/events/{private}', 'organizer', ()),
+    ('DELETE', '/locations/{location}/', 'organizer', ()),
+]
+
+BODIES = {
+    '/events/{public}': {'capacity': 3},
+    '/events/{private}/reservations/confirm': {'attendee_ids': ['attendee']},
+    '/events/{private}/reservations/status': {'attendee_ids': ['attendee'], 'status': 'INVITED'},
+    '/events/{public}/reservations/cancel': {'attendee_ids': ['attendee']},
+}
+
+
+@pytest.fixture
+def dataset(app, client, organizer, make_event, make_attendees):
+    """A public event with one slot, booked by ``attendee`` with ``waiting``
+    on its waitlist, and a private event ``attendee`` and ``waiting`` are
+    invited to."""
+    public = make_event('Public gathering', capacity=1)
+    private = make_event('Private gathering', type='private', capacity=10)
+    (attendee, attendee_token), (waiting, waiting_token), (other, other_token) = make_attendees(3)
+    url = app.config['PREFIX'] + '/events/%d/reservations' % public
+    assert client.post(url, headers=auth(attendee_token)).status_code == 201
+    assert client.post(url, headers=auth(waiting_token)).status_code == 202
+    with app.app_context():
+        for attendee_id in (attendee, waiting):
+            db.session.add(Reservation(status='PENDING', event_id=private, attendee_id=attendee_id))
+        db.session.commit()
+    return {
+        'ids': {'public': public, 'private': private, 'location': organizer[1], 'organizer': 1,
+                'attendee': attendee},
+        'tokens': {'organizer': organizer[0], 'attendee': attendee_token, 'other': other_token},
+    }
+
+
+def full_scans(app, statements):
+    with app.app_context():
+        connection = db.engine.raw_connection()
+        try:
+            for sql, parameters in statements:
+                for row in connection.execute('EXPLAIN QUERY PLAN ' + sql, parameters):
+                    detail = row[3].split()
+                    # Constant rows and subquery results are not tables, and
+                    # the FTS5 table answers MATCH from its own index.
+                    if detail[0] == 'SCAN' and detail[1] not in ('CONSTANT', 'SUBQUERY') \
+                            and not detail[1].startswith('(') and 'VIRTUAL' not in detail:
+                        yield detail[1], ' '.join(sql.split())
+        finally:
+            connection.close()
+
+
+@pytest.mark.parametrize('method, path, token, allowed', ROUTES)
+def test_route_queries_use_indexes(app, client, dataset, method, path, token, allowed):
+    ids = dataset['ids']
+    body = BODIES.get(path)
+    if body is not None and 'attendee_ids' in body:
+        body = dict(body, attendee_ids=[ids[x] for x in body['attendee_ids']])
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.open(app.config['PREFIX'] + path.format(**ids), method=method, json=body,
+                               headers=auth(dataset['tokens'][token]) if token else {})
+        response.get_data()
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    assert response.status_code < 300, response.get_data(as_text=True)
+    assert statements
+    scans = [(table, sql) for table, sql in full_scans(app, statements) if table not in allowed]
+    assert not scans, 'full table scans: %r' % scans
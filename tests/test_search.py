@@ -0,0 +1,116 @@
+import pytest
+
+from conftest import auth
+
+from app import db
+from app.models.event import Event
+from app.models.reservation import Reservation
+
+
+@pytest.fixture
+def search(app, client):
+    def search(query, token=None):
+        response = client.get(app.config['PREFIX'] + '/events/search?' + query,
+                              headers=auth(token) if token else None)
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()
+    return search
+
+
+def titles(response):
+    return sorted(x['detail']['title'] for x in response['data'])
+
+
+@pytest.fixture
+def events(make_event):
+    make_event('Salsa night', capacity=10, category='dance')
+    make_event('Salsa workshop', capacity=10, category='class')
+    make_event('Tango night', capacity=10, category='dance')
+    make_event('Python meetup', capacity=10)
+
+
+def test_every_term_matches_as_a_prefix(search, events):
+    assert titles(search('q=sal')) == ['Salsa night', 'Salsa workshop']
+    assert titles(search('q=salsa+nig')) == ['Salsa night']
+    assert titles(search('q=night')) == ['Salsa night', 'Tango night']
+    assert titles(search('q=salsa+python')) == []
+
+
+def test_matches_description_and_category(search, events):
+    # make_event describes every event as "About <title>".
+    assert len(search('q=about')['data']) == 4
+    assert titles(search('q=danc')) == ['Salsa night', 'Tango night']
+
+
+def test_query_syntax_is_not_interpreted(search, events):
+    # FTS5 would read these as a column filter, a phrase and an operator.
+    assert titles(search('q=title:tango')) == []
+    assert titles(search('q="tango')) == ['Tango night']
+    assert titles(search('q=tango+OR+salsa')) == []
+
+
+def test_index_follows_updates_and_deletes(app, search, events):
+    with app.app_context():
+        event = Event.query.filter_by(title='Tango night').one()
+        event.title = 'Milonga night'
+        db.session.commit()
+        db.session.delete(Event.query.filter_by(title='Python meetup').one())
+        db.session.commit()
+    assert titles(search('q=milonga')) == ['Milonga night']
+    assert titles(search('q=python')) == []
+
+
+def test_facets_count_every_match(search, events):
+    # One event on the page, the facets still count all four.
+    assert search('q=about&limit=1')['facets'] == {
+        'category': [{'value': 'dance', 'count': 2}, {'value': 'class', 'count': 1},
+                     {'value': 'talk', 'count': 1}],
+        'type': [{'value': 'public', 'count': 4}],
+    }
+    response = search('q=night&category=dance')
+    assert len(response['data']) == 2
+    assert response['facets'] == {'category': [{'value': 'dance', 'count': 2}],
+                                  'type': [{'value': 'public', 'count': 2}]}
+
+
+@pytest.fixture
+def private_event(app, make_event, make_attendees):
+    """A public and a private event, and tokens of an invited and an
+    uninvited attendee."""
+    make_event('Open party', capacity=10)
+    event_id = make_event('Secret party', type='private', capacity=10)
+    (invited_id, invited), (_, uninvited) = make_attendees(2)
+    with app.app_context():
+        db.session.add(Reservation(event_id=event_id, attendee_id=invited_id, status='PENDING'))
+        db.session.commit()
+    return invited, uninvited
+
+
+def test_anonymous_callers_see_public_events(search, private_event):
+    response = search('q=party')
+    assert titles(response) == ['Open party']
+    assert response['facets']['type'] == [{'value': 'public', 'count': 1}]
+
+
+def test_invited_attendee_sees_private_event(search, private_event):
+    invited, _ = private_event
+    response = search('q=party', invited)
+    assert titles(response) == ['Open party', 'Secret party']
+    assert response['facets']['type'] == [{'value': 'private', 'count': 1}, {'value': 'public', 'count': 1}]
+
+
+def test_uninvited_attendee_sees_public_events(search, private_event):
+    _, uninvited = private_event
+    assert titles(search('q=party', uninvited)) == ['Open party']
+
+
+def test_owner_sees_private_event(search, organizer, private_event):
+    token, _ = organizer
+    assert titles(search('q=party', token)) == ['Open party', 'Secret party']
+
+
+def test_other_organizer_sees_public_events(app, client, search, private_event):
+    token = client.post(app.config['PREFIX'] + '/organizers/register', json={
+        'email': 'other@example.com', 'password': 'secret', 'firstname': 'O', 'lastname': 'Ther', 'phone': '2'
+    }).get_json()['token']
+    assert titles(search('q=party', token)) == ['Open party']
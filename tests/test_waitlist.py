@@ -0,0 +1,160 @@
+import pytest
+
+from app import db
+from app.email import send_emails_async
+from app.errors import FullSlotError
+from app.models import reservation as reservation_model
+from app.models.attendee import Attendee
+from app.models.event import Event
+from app.models.reservation import Reservation, rebuild_reservation_counters
+from app.waitlist import promote_waitlisted
+from conftest import auth
+
+
+@pytest.fixture
+def waitlist(app, client, make_event, make_attendees):
+    """A public event for two, booked by five attendees: the first two hold
+    the slots, the other three are waitlisted in booking order."""
+    event_id = make_event(capacity=2)
+    attendees = make_attendees(5)
+    url = app.config['PREFIX'] + '/events/%d/reservations' % event_id
+    codes = [client.post(url, headers=auth(token)).status_code for _, token in attendees]
+    assert codes == [201, 201, 202, 202, 202]
+    app.extensions['task_queue'].jobs.clear()
+    return event_id, attendees
+
+
+def state(app, event_id):
+    """``{attendee_id: (status, position)}`` of the event's reservations, and
+    its (pending_count, invited_count), checked against a recount."""
+    with app.app_context():
+        reservations = {attendee_id: (status, position) for attendee_id, status, position in db.session.query(
+            Reservation.attendee_id, Reservation.status, Reservation.position).filter_by(event_id=event_id)}
+        event = db.session.query(Event).get(event_id)
+        kept = event.pending_count, event.invited_count
+        rebuild_reservation_counters()
+        db.session.refresh(event)
+        assert (event.pending_count, event.invited_count) == kept
+        return reservations, kept
+
+
+def invited(app, event_id):
+    return sorted(x for x, (status, _) in state(app, event_id)[0].items() if status == 'INVITED')
+
+
+def notified(app):
+    recipients = []
+    for f, args, _ in app.extensions['task_queue'].jobs:
+        if f is send_emails_async:
+            recipients += [x.recipients[0] for x in args[0] if x.subject == 'You are off the waitlist']
+    return recipients
+
+
+def emails(app, attendee_ids):
+    with app.app_context():
+        return [db.session.query(Attendee).get(x).email for x in attendee_ids]
+
+
+def set_event(app, event_id, **values):
+    with app.app_context():
+        db.session.query(Event).filter_by(id=event_id).update(values)
+        db.session.commit()
+
+
+def test_cancelling_promotes_the_first_in_line(app, client, waitlist):
+    event_id, attendees = waitlist
+    ids = [x for x, _ in attendees]
+    response = client.delete(app.config['PREFIX'] + '/events/%d/reservations' % event_id,
+                             headers=auth(attendees[0][1]))
+    assert response.status_code == 201
+    reservations, counters = state(app, event_id)
+    assert reservations[ids[2]] == ('INVITED', None)
+    assert ids[0] not in reservations
+    assert [reservations[x][0] for x in ids[3:]] == ['WAITLISTED', 'WAITLISTED']
+    assert counters == (0, 2)
+    assert notified(app) == emails(app, ids[2:3])
+
+
+def test_raising_the_capacity_promotes_in_order(app, client, organizer, waitlist):
+    event_id, attendees = waitlist
+    ids = [x for x, _ in attendees]
+    response = client.put(app.config['PREFIX'] + '/events/%d' % event_id, json={'capacity': 4},
+                          headers=auth(organizer[0]))
+    assert response.status_code == 201
+    assert invited(app, event_id) == ids[:4]
+    assert state(app, event_id)[1] == (0, 4)
+    assert notified(app) == emails(app, ids[2:4])
+
+
+def test_bulk_cancel_promotes(app, client, organizer, waitlist):
+    event_id, attendees = waitlist
+    ids = [x for x, _ in attendees]
+    response = client.post(app.config['PREFIX'] + '/events/%d/reservations/cancel' % event_id,
+                           json={'attendee_ids': ids[:2]}, headers=auth(organizer[0]))
+    assert response.status_code == 201
+    assert invited(app, event_id) == ids[2:4]
+    assert state(app, event_id)[1] == (0, 2)
+    assert notified(app) == emails(app, ids[2:4])
+
+
+def test_bulk_status_promotes_into_a_freed_slot(app, client, organizer, waitlist):
+    event_id, attendees = waitlist
+    ids = [x for x, _ in attendees]
+    response = client.post(app.config['PREFIX'] + '/events/%d/reservations/status' % event_id,
+                           json={'attendee_ids': ids[:1], 'status': 'PENDING'}, headers=auth(organizer[0]))
+    assert response.status_code == 201
+    reservations, counters = state(app, event_id)
+    assert reservations[ids[0]] == ('PENDING', None)
+    assert invited(app, event_id) == [ids[1], ids[2]]
+    assert counters == (1, 2)
+    assert notified(app) == emails(app, ids[2:3])
+
+
+def test_organizer_can_confirm_from_the_waitlist(app, client, organizer, waitlist):
+    event_id, attendees = waitlist
+    ids = [x for x, _ in attendees]
+    url = app.config['PREFIX'] + '/events/%d/reservations/confirm' % event_id
+    # Full: nobody moves.
+    response = client.post(url, json={'attendee_ids': ids[4:]}, headers=auth(organizer[0]))
+    assert response.status_code == 400
+    set_event(app, event_id, capacity=3)
+    response = client.post(url, json={'attendee_ids': ids[4:]}, headers=auth(organizer[0]))
+    assert response.status_code == 201
+    assert response.get_json()['errors'] == {}
+    reservations, counters = state(app, event_id)
+    assert reservations[ids[4]] == ('INVITED', None)
+    assert counters == (0, 3)
+
+
+def test_promotion_order_is_position_then_id(app, client, waitlist):
+    event_id, attendees = waitlist
+    ids = [x for x, _ in attendees]
+    with app.app_context():
+        for attendee_id, position in zip(ids[2:], (2, 1, 1)):
+            db.session.query(Reservation).filter_by(event_id=event_id, attendee_id=attendee_id) \
+                .update({'position': position})
+        db.session.commit()
+    response = client.delete(app.config['PREFIX'] + '/events/%d/reservations' % event_id,
+                             headers=auth(attendees[0][1]))
+    assert response.status_code == 201
+    assert invited(app, event_id) == [ids[1], ids[3]]
+
+
+def test_promotion_backs_off_when_the_slots_are_taken(app, waitlist, monkeypatch):
+    event_id, attendees = waitlist
+    before = state(app, event_id)
+    set_event(app, event_id, capacity=3)
+    adjust_counter = reservation_model.adjust_counter
+
+    def claimed_meanwhile(connection, event_id, status, delta):
+        # A concurrent request takes the freed slot between the capacity
+        # read and the claim.
+        if delta > 0:
+            raise FullSlotError()
+        adjust_counter(connection, event_id, status, delta)
+
+    monkeypatch.setattr(reservation_model, 'adjust_counter', claimed_meanwhile)
+    with app.app_context():
+        assert promote_waitlisted(event_id) == []
+        db.session.commit()
+    assert state(app, event_id) == before
@@ -1,4 +1,25 @@
-from app import app
+from app import create_app, db
+
+app = create_app()
+
+
+def warm_db_pool():
+    # Runs in each worker after the fork: drop anything inherited from the
+    # master and open the pool's connections before the first request.
+    engine = db.get_engine(app)
+    engine.dispose()
+    size = app.config['SQLALCHEMY_POOL_SIZE'] or 0
+    connections = [engine.connect() for _ in range(size)]
+    for connection in connections:
+        connection.close()
+
+
+try:
+    from uwsgidecorators import postfork
+except ImportError:
+    pass
+else:
+    postfork(warm_db_pool)
 
 if __name__ == "__main__":
     app.run(threaded=True)